@@ -1,9 +1,38 @@
-from flask import Flask, jsonify, send_from_directory, request  # 导入 Flask 和 jsonify [[1]]
+from flask import Flask, jsonify, send_from_directory, send_file, request, make_response, abort  # 导入 Flask 和 jsonify [[1]]
 from flask_cors import CORS  # 导入 CORS [[2]]
 import os
 import frontmatter
-from pypinyin import lazy_pinyin
 import hashlib
+import threading
+import atexit
+import base64
+import bisect
+import json
+import math
+import re
+import shutil
+import tempfile
+import functools
+import click
+from datetime import datetime
+from werkzeug.http import is_resource_modified
+from werkzeug.security import safe_join
+from werkzeug.exceptions import RequestEntityTooLarge
+from catalog import BackgroundBuild, Collection, FieldIndex
+from ranking import is_finite_order, sparse_orders, rebalanced_orders, ORDER_GAP
+from journal import Journal
+from index_db import IndexStore
+from watcher import ContentWatcher
+from search import SearchIndex, PrefixIndex, pinyin_key, pinyin_tokens
+from locks import FileLock
+from storage import FileStore
+from thumbnails import Thumbnailer
+from images import ImageResolver
+from uploads import UploadError, ResumableUploads, allowed_extension
+from blobs import BlobStore
+from imgbed import ImgbedIndex
+from exporter import EXPORT_FORMATS, EXPORT_COLUMNS, export_row, ndjson_stream, csv_stream, xlsx_stream, archive_stream
+from importer import ImportRowError, ROW_KINDS, detect_format, read_rows, row_kind, movie_fields, actor_fields
 
 app = Flask(__name__)
 CORS(app)  # 启用 CORS 支持 [[2]]
@@ -27,216 +56,862 @@ ACTOR_COVER_FOLDER = os.path.join(COVER_FOLDER, 'actor-cover')
 POST_COVER_FOLDER = os.path.join(COVER_FOLDER, 'post-cover')
 IMGBED_FOLDER = os.path.join(CONTENT_FOLDER, 'imgbed')
 
+# 运行时状态（元数据日志等）存放目录
+STATE_FOLDER = os.path.join(CONTENT_FOLDER, '.state')
+
+# 元数据日志写回 Markdown 文件的合并间隔（秒）
+JOURNAL_FLUSH_INTERVAL = float(os.environ.get('JOURNAL_FLUSH_INTERVAL', '2'))
+
+# 持久化元数据索引（SQLite）路径，设置为空字符串可关闭
+INDEX_DB = os.environ.get('INDEX_DB', os.path.join(STATE_FOLDER, 'index.sqlite3'))
+
+# 是否监听内容文件夹变化（外部编辑、git pull 等），以及兜底全量扫描的间隔（秒）
+WATCH_CONTENT = os.environ.get('WATCH_CONTENT', '1') == '1'
+WATCH_RESCAN_INTERVAL = float(os.environ.get('WATCH_RESCAN_INTERVAL', '300'))
+
+# 缩略图缓存目录，以及上传图片后预先生成的宽度（页面卡片使用的尺寸）
+THUMBNAIL_FOLDER = os.path.join(STATE_FOLDER, 'thumbnails')
+THUMBNAIL_PRESET_WIDTHS = (320, 480, 640, 960)
+
+# 图片响应的缓存时间（秒），过期后凭 ETag 校验；同名替换的封面最多在这段时间内显示旧图。
+# URL 带 v=内容哈希 时内容不会变化，缓存一年并标记 immutable
+IMAGE_MAX_AGE = int(os.environ.get('IMAGE_MAX_AGE', '3600'))
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# 上传限制：单个图片的大小，以及单次请求的总大小（超过时在读取请求体之前直接返回 413）
+UPLOAD_MAX_MB = int(os.environ.get('UPLOAD_MAX_MB', '10'))
+UPLOAD_MAX_REQUEST_MB = int(os.environ.get('UPLOAD_MAX_REQUEST_MB', '50'))
+app.config['MAX_CONTENT_LENGTH'] = UPLOAD_MAX_REQUEST_MB * 1024 * 1024
+
+# 图床新图片是否按文件名哈希存放到子文件夹 imgbed/ab/ 中（图片很多时避免单个目录过大）
+IMGBED_SHARDING = os.environ.get('IMGBED_SHARDING', '0') == '1'
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.webp'}
+
+# 数据总览（/api/stats）中各列表的条数
+STATS_TOP_MOVIES = 3
+STATS_RECENT_POSTS = 3
+STATS_TOP_TAGS = 8
+
+# 批量导入：每批写入的文件数（每批统一落盘一次），以及汇总中最多保留的错误条数
+IMPORT_BATCH_SIZE = 500
+IMPORT_MAX_ERRORS = 100
+
+# 生产模式（gunicorn）的工作进程数，gunicorn.conf.py 会在 post_fork 中按实际启动的进程数（包括 -w 参数）设置。
+# 各进程的内存缓存依靠文件 mtime 检查和文件监听保持一致；元数据日志的待写入字段只存在于单个进程内存中，
+# 因此只在单进程时启用，并且要独占日志锁：平滑重载时新旧进程短暂并存、或命令行工具与服务同时运行时，
+# 拿不到锁的进程直接写文件，同一份日志不会被两个进程写回
+WEB_WORKERS = int(os.environ.get('WEB_WORKERS', '1'))
+journal_owner = FileLock(os.path.join(STATE_FOLDER, 'journal.lock'))
+USE_JOURNAL = WEB_WORKERS == 1 and journal_owner.acquire(blocking=False)
+
+# 开发服务器是否开启调试模式（默认关闭）
+FLASK_DEBUG = os.environ.get('FLASK_DEBUG', '0') == '1'
+
+# 排行模式：sparse 使用带间隔的 order，移动一部影片只写一个文件；dense 为连续整数
+RANKING_MODE = os.environ.get('RANKING_MODE', 'sparse')
+
+def build_movie_record(filename, post):
+    """
+    由解析后的影片 Markdown 构建接口返回的影片数据。
+    """
+    return {
+        "id": filename,
+        "title": post.get('title', '未知标题'),
+        "actors": post.get('actors', '未知演员'),
+        "tags": post.get('tags', []),
+        "description": post.get('description', '暂无描述'),
+        "cover": f"/imgs/{MOVIE_COVER_FOLDER}/{post.get('cover')}",
+        "order": post.get('order', float('inf')),
+        "rating": post.get('rating', 0),
+        "body": post.content,  # 只返回原始正文内容
+    }
+
+
+def build_actor_record(filename, post):
+    """
+    由解析后的演员 Markdown 构建演员列表数据。
+    """
+    return {
+        "name": post.get('name', '未知演员'),
+        "birth": post.get('birth', '未知出生日期'),
+        "debut": post.get('debut', '未知出道日期'),
+        "favorite": post.get('favorite', 1),  # 默认喜爱度为1
+        "cover": f"/imgs/{ACTOR_COVER_FOLDER}/{post.get('cover')}",
+        "x": post.get('x', ''),
+        "instagram": post.get('instagram', ''),
+        "wiki": post.get('wiki', ''),
+    }
+
+
+def build_post_record(filename, post):
+    """
+    由解析后的博客 Markdown 构建文章数据。
+    """
+    return {
+        "slug": os.path.splitext(filename)[0],  # 去掉.md后缀作为slug
+        "title": post.get('title', '未知标题'),
+        "date": post.get('date', ''),
+        "author": post.get('author', '未知作者'),
+        "tags": post.get('tags', []),
+        "excerpt": post.get('excerpt', ''),
+        "content": post.content,
+    }
+
+
+# 持久化索引：重启后只重新解析 mtime/size 变化的文件
+index_store = IndexStore(INDEX_DB) if INDEX_DB else None
+
+# Markdown 文件的写入：按文件加锁，临时文件写完后原子替换，读取方永远看不到写了一半的文件
+content_store = FileStore(os.path.join(STATE_FOLDER, 'locks'))
+
+# 图片缩略图：按需生成并缓存在磁盘上，原图变化后自动失效
+thumbnailer = Thumbnailer(THUMBNAIL_FOLDER)
+
+# /imgs 请求路径 -> 所在根目录的缓存（含未找到的路径），由上传接口和文件监听失效
+IMAGE_ROOTS = [
+    CONTENT_FOLDER,
+    IMGBED_FOLDER,
+    f'{MOVIES_FOLDER}/imgs',
+    f'{ACTORS_FOLDER}/imgs',
+    f'{POSTS_FOLDER}/imgs',
+]
+image_resolver = ImageResolver(IMAGE_ROOTS, fallback=lambda filename: find_imgbed_image(filename))
+
+# 图床图片索引：按修改时间倒序，上传和文件监听时增量更新
+imgbed_index = ImgbedIndex(IMGBED_FOLDER, IMAGE_EXTENSIONS, sharded=IMGBED_SHARDING)
+
+
+def find_imgbed_image(filename):
+    """
+    /imgs/imgbed/<文件名>（或 /imgs/<文件名>）对应的图片存放在分片子文件夹时，返回 (根目录, 相对路径)。
+    """
+    name = filename[len('imgbed/'):] if filename.startswith('imgbed/') else filename
+    relpath = imgbed_index.relpath(name) if '/' not in name else None
+    return (IMGBED_FOLDER, relpath) if relpath else None
+
+# 按内容寻址的图片存储：封面和图床文件是指向 blob 的硬链接，相同内容只存一份
+blob_store = BlobStore(os.path.join(STATE_FOLDER, 'blobs'))
+blob_gc_scheduled = threading.Event()
+
+# 图床的断点续传任务
+resumable_uploads = ResumableUploads(os.path.join(STATE_FOLDER, 'uploads'), UPLOAD_MAX_MB * 1024 * 1024,
+                                     save=blob_store.store)
+
+# 进程内内容缓存：启动时解析一次，之后只重新解析 mtime/size 变化的文件
+# 已记入元数据日志但尚未写回文件的字段会叠加在缓存记录之上
+movies_catalog = Collection(MOVIES_FOLDER, build_movie_record, store=index_store,
+                            overlay=lambda filename: metadata_journal.pending('movies', filename))
+actors_catalog = Collection(ACTORS_FOLDER, build_actor_record, store=index_store,
+                            overlay=lambda filename: metadata_journal.pending('actors', filename))
+posts_catalog = Collection(POSTS_FOLDER, build_post_record, store=index_store)
+
+# 影片标题 -> 文件名索引，/api/movie/<movie_name> 据此 O(1) 查找
+movie_title_index = FieldIndex(movies_catalog, lambda movie: [movie['title']])
+
+
+def movie_tags(movie):
+    tags = movie.get('tags') or []
+    if isinstance(tags, str):
+        tags = [tags]
+    return [tag for tag in tags if isinstance(tag, str)]
+
+
+# 标签 -> 影片文件名集合的倒排索引，标签统计与多标签查询都基于集合运算
+movie_tag_index = FieldIndex(movies_catalog, movie_tags)
+
+
+def movie_actors(movie):
+    actors = movie.get('actors') or ''
+    if isinstance(actors, str):
+        actors = actors.split(',')
+    return [actor.strip() for actor in actors if isinstance(actor, str) and actor.strip()]
+
+
+def score_bucket(value):
+    """
+    1-5 分的评分/喜爱度按四舍五入归入整数区间，缺失或超出范围的不计入。
+    """
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return []
+    return [int(value + 0.5)] if 1 <= value <= 5 else []
+
+
+# 演员 <-> 影片关系图：影片 -> 演员直接来自 front matter 的 actors 字段，演员 -> 影片为倒排索引，
+# 随内容缓存的变更回调增量维护（影片改动演员时旧的关系自动移除），作品和合作演员查询只访问相邻节点
+movie_actor_index = FieldIndex(movies_catalog, movie_actors)
+
+# 数据总览用到的统计：评分区间 -> 影片、喜爱度区间 -> 演员
+movie_rating_index = FieldIndex(movies_catalog, lambda movie: score_bucket(movie['rating']))
+actor_favorite_index = FieldIndex(actors_catalog, lambda actor: score_bucket(actor['favorite']))
+
+# 影片、演员、文章的全文索引，随内容缓存增量更新
+search_index = SearchIndex()
+# 分词和拼音计算量大，启动时不在 refresh() 中构建，由后台线程在内容缓存载入后补齐
+search_build = BackgroundBuild()
+
+
+def index_movie(filename, old_record, movie):
+    if movie is None:
+        search_index.remove(('movie', filename))
+        return
+    summary = ' '.join([str(movie['description']), str(movie['actors'])] + movie_tags(movie))
+    search_index.update(('movie', filename), str(movie['title']), summary, movie['body'])
+
+
+def index_actor(filename, old_record, actor):
+    name = os.path.splitext(filename)[0]
+    if actor is None:
+        search_index.remove(('actor', name))
+        return
+    post = actors_catalog.cached_post(filename)
+    search_index.update(('actor', name), str(actor['name']), '', post.content if post else '')
+
+
+def index_post(filename, old_record, post):
+    if post is None:
+        search_index.remove(('post', os.path.splitext(filename)[0]))
+        return
+    summary = ' '.join([str(post['excerpt'])] + [str(tag) for tag in post['tags'] or []])
+    search_index.update(('post', post['slug']), str(post['title']), summary, post['content'])
+
+
+# 演员姓名、拼音全拼和首字母的前缀索引，用于自动补全（如 zs -> 张三）
+actor_name_index = PrefixIndex()
+
+# 演员姓名 -> 拼音排序键。由后台构建的变更回调填充，不占用启动时的 refresh()；
+# 构建完成前排序用到的姓名按需计算并缓存
+actor_pinyin_keys = {}
+
+
+def actor_pinyin(name):
+    name = str(name)
+    key = actor_pinyin_keys.get(name)
+    if key is None:
+        key = actor_pinyin_keys[name] = pinyin_key(name)
+    return key
+
+
+def index_actor_name(filename, old_actor, actor):
+    if old_actor is not None and (actor is None or old_actor['name'] != actor['name']):
+        actor_pinyin_keys.pop(str(old_actor['name']), None)
+    if actor is None:
+        actor_name_index.remove(filename)
+        return
+    if old_actor is not None and old_actor['name'] == actor['name']:
+        return  # 姓名未变，拼音无需重新计算
+    name = str(actor['name'])
+    actor_name_index.update(filename, [name, actor_pinyin(name)] + pinyin_tokens(name)[:2])
+
+
+search_build.bind(movies_catalog, index_movie)
+search_build.bind(actors_catalog, index_actor)
+search_build.bind(posts_catalog, index_post)
+search_build.bind(actors_catalog, index_actor_name)
+
+
+def movie_sort_key(movie):
+    return (movie['order'], movie['title'])
+
+
+# /api/movies 分页可用的排序方式，键中带上 id 保证顺序唯一、游标稳定
+def movie_order_key(movie):
+    return (movie['order'], str(movie['title']), movie['id'])
+
+
+def movie_rating_key(movie):
+    return (-(movie['rating'] or 0), movie['order'], str(movie['title']), movie['id'])
+
+
+def movie_title_key(movie):
+    return (str(movie['title']), movie['id'])
+
+
+MOVIE_SORT_KEYS = {
+    'order': movie_order_key,  # 排行顺序
+    'rating': movie_rating_key,  # 评分从高到低
+    'title': movie_title_key,  # 标题
+}
+
+
+def actor_sort_key(actor):
+    return (actor_pinyin(actor['name']), str(actor['name']))
+
+
+def post_sort_key(post):
+    return post['date']
+
+
 def parse_movie_files():
     """
-    解析 content 文件夹中的所有 Markdown 文件，并返回解析后的数据列表。
-    """
-    movies = []
-    for filename in os.listdir(MOVIES_FOLDER):
-        if filename.endswith('.md'):
-            file_path = os.path.join(MOVIES_FOLDER, filename)
-            with open(file_path, 'r', encoding='utf-8') as f:
-                post = frontmatter.load(f)  # 使用 frontmatter 解析 Markdown 文件 [[3]]
-                movie_data = {
-                    "id": filename,
-                    "title": post.get('title', '未知标题'),
-                    "actors": post.get('actors', '未知演员'),
-                    "tags": post.get('tags', []),
-                    "description": post.get('description', '暂无描述'),
-                    "cover": f"/imgs/{MOVIE_COVER_FOLDER}/{post.get('cover')}",
-                    "order": post.get('order', float('inf')),
-                    "rating": post.get('rating', 0),
-                    "body": post.content,  # 只返回原始正文内容
-                }
-                movies.append(movie_data)
-    movies.sort(key=lambda x: (x['order'], x['title']))
-    return movies
+    返回所有影片数据（来自内容缓存），按 order 和标题排序。
+    """
+    return movies_catalog.records(sort_key=movie_sort_key)
 
 
 def parse_actor_files():
     """
-    解析 actors 文件夹中的所有 Markdown 文件，并返回解析后的数据列表。
-    """
-    actors = []
-    for filename in os.listdir(ACTORS_FOLDER):
-        if filename.endswith('.md'):
-            file_path = os.path.join(ACTORS_FOLDER, filename)
-            with open(file_path, 'r', encoding='utf-8') as f:
-                post = frontmatter.load(f)
-                actor_data = {
-                    "name": post.get('name', '未知演员'),
-                    "birth": post.get('birth', '未知出生日期'),
-                    "debut": post.get('debut', '未知出道日期'),
-                    "favorite": post.get('favorite', 1),  # 默认喜爱度为1
-                    "cover": f"/imgs/{ACTOR_COVER_FOLDER}/{post.get('cover')}",
-                    "x": post.get('x', ''),
-                    "instagram": post.get('instagram', ''),
-                    "wiki": post.get('wiki', ''),
-                }
-                actors.append(actor_data)
-    return actors
+    返回所有演员数据（来自内容缓存）。
+    """
+    return actors_catalog.records()
 
 
 def parse_post_files():
     """
-    解析 posts 文件夹中的所有 Markdown 文件，并返回解析后的数据列表。
+    返回所有博客文章数据（来自内容缓存），最新的在前面。
     """
-    posts = []
-    if not os.path.exists(POSTS_FOLDER):
-        return posts
-    
-    for filename in os.listdir(POSTS_FOLDER):
-        if filename.endswith('.md'):
-            file_path = os.path.join(POSTS_FOLDER, filename)
-            with open(file_path, 'r', encoding='utf-8') as f:
-                post = frontmatter.load(f)
-                slug = os.path.splitext(filename)[0]  # 去掉.md后缀作为slug
-                post_data = {
-                    "slug": slug,
-                    "title": post.get('title', '未知标题'),
-                    "date": post.get('date', ''),
-                    "author": post.get('author', '未知作者'),
-                    "tags": post.get('tags', []),
-                    "excerpt": post.get('excerpt', ''),
-                    "content": post.content,
-                }
-                posts.append(post_data)
-    
-    # 按日期排序，最新的在前面
-    posts.sort(key=lambda x: x['date'], reverse=True)
-    return posts
+    return posts_catalog.records(sort_key=post_sort_key, reverse=True)
 
 
+def get_post_by_slug(slug):
+    """
+    根据slug获取特定的博客文章。
+    """
+    return posts_catalog.get(f"{slug}.md")
+
 
+def movie_card(filename):
+    """
+    构建影片卡片数据（MoviePreview 使用的格式）。
+    """
+    post = movies_catalog.get_post(filename)
+    return {
+        "id": filename,
+        "title": post.get('title'),
+        "actors": post.get('actors', ''),
+        "tags": post.get('tags', []),
+        "description": post.get('description', ''),
+        "cover": f"/imgs/{MOVIE_COVER_FOLDER}/{post.get('cover')}",
+        "rating": post.get('rating', 0),
+        "body": post.content,  # 只返回原始正文内容
+    }
+
+
+def missing_movie_card(movie_name):
+    """
+    尚未收录的影片的占位卡片。
+    """
+    return {
+        "id": None,
+        "title": movie_name,
+        "actors": '',
+        "tags": [],
+        "description": '待观看',
+        "cover": '/imgs/default_cover.jpg',
+        "rating": 0,
+        "body": '',
+    }
 
 
-def get_post_by_slug(slug):
+def find_movie_card(movie_name, refresh=True):
     """
-    根据slug获取特定的博客文章。
+    通过标题索引查找影片卡片，未收录时返回占位卡片。
     """
-    file_path = os.path.join(POSTS_FOLDER, f"{slug}.md")
-    if not os.path.exists(file_path):
-        return None
-    
-    with open(file_path, 'r', encoding='utf-8') as f:
-        post = frontmatter.load(f)
-        
-        post_data = {
-            "slug": slug,
-            "title": post.get('title', '未知标题'),
-            "date": post.get('date', ''),
-            "author": post.get('author', '未知作者'),
-            "tags": post.get('tags', []),
-            "excerpt": post.get('excerpt', ''),
-            "content": post.content,
-        }
-        return post_data
+    filename = movie_title_index.first(movie_name, refresh)
+    if filename is None or movies_catalog.get_post(filename) is None:
+        return missing_movie_card(movie_name)
+    return movie_card(filename)
 
-def append_mainwork(actor, movie):
+
+def split_mainworks(body):
     """
-    将演员的主要作品添加到演员数据中，覆盖更新 body 部分，header 不变。
+    把演员正文拆分为“主要作品”之前的部分和“主要作品”部分（不存在时新建）。
     """
-    actor_file = os.path.join(ACTORS_FOLDER, f"{actor}.md")
-    if not os.path.exists(actor_file):
-        return
-    with open(actor_file, 'r+', encoding='utf-8') as f:
-        post = frontmatter.load(f)
-        body = post.content
-
-        # 查找“主要作品”部分，如果不存在则创建
-        if "## 主要作品" not in body:
-            body += "\n## 主要作品\n"
-
-        # 拆分正文，定位“主要作品”部分
-        mainworks_start = body.find("## 主要作品")
-        if mainworks_start != -1:
-            before = body[:mainworks_start]
-            mainworks_section = body[mainworks_start:]
-        else:
-            before = body
-            mainworks_section = "\n## 主要作品\n"
+    mainworks_start = body.find("## 主要作品")
+    if mainworks_start == -1:
+        return body, "\n## 主要作品\n"
+    return body[:mainworks_start], body[mainworks_start:]
 
-        # 检查影片是否已存在于"主要作品"部分
-        if f"<movie title=\"{movie}\" />" not in mainworks_section:
-            # 添加影片到"主要作品"部分，确保有空行间隔
+
+def mainwork_line(movie):
+    return f"<movie title=\"{movie}\" />"
+
+
+def mainwork_titles(section):
+    """
+    “主要作品”部分中已经引用的影片标题。
+    """
+    return set(re.findall(r'<movie title="([^"]*)" />', section))
+
+
+def edit_mainworks(actor, removed=(), added=()):
+    """
+    更新演员正文的“主要作品”部分：删去 removed 中的影片，追加 added 中的影片，header 不变。
+    多部影片的变化合并为一次读写；没有实际变化时不重写文件。返回是否写入了文件。
+    """
+    filename = f"{actor}.md"
+    cached = actors_catalog.get_post(filename)
+    if cached is None:
+        return False
+    titles = mainwork_titles(split_mainworks(cached.content)[1])
+    removed = [movie for movie in dict.fromkeys(removed) if movie in titles]
+    added = [movie for movie in dict.fromkeys(added) if movie not in titles or movie in removed]
+    if not removed and not added:
+        return False
+
+    metadata_journal.flush_file('actors', filename)
+    with content_store.edit(os.path.join(ACTORS_FOLDER, filename)) as post:
+        before, mainworks_section = split_mainworks(post.content)
+
+        if removed:
+            lines = {mainwork_line(movie) for movie in removed}
+            mainworks_section = '\n'.join(
+                line for line in mainworks_section.split('\n') if line.strip() not in lines
+            )
+            print(f"Removed {removed[0] if len(removed) == 1 else f'{len(removed)} movies'} from {actor}'s main works")
+
+        existing = mainwork_titles(mainworks_section)
+        for movie in added:
+            # 检查影片是否已存在于"主要作品"部分；添加时确保有空行间隔
+            if movie in existing:
+                continue
             if not mainworks_section.endswith('\n\n'):
                 if mainworks_section.endswith('\n'):
                     mainworks_section += '\n'
                 else:
                     mainworks_section += '\n\n'
-            mainworks_section += f"<movie title=\"{movie}\" />\n"
+            mainworks_section += mainwork_line(movie) + '\n'
 
-        # 组装新的正文
-        new_body = before.rstrip('\n') + '\n' + mainworks_section.lstrip('\n')
+        if added:
+            # 组装新的正文
+            post.content = before.rstrip('\n') + '\n' + mainworks_section.lstrip('\n')
+            print(f"Updated {actor}'s main works with {added[0] if len(added) == 1 else f'{len(added)} movies'}")
+        else:
+            post.content = before + mainworks_section
+        # with 代码块结束时原子写回（只覆盖正文，header 不变）
+    actors_catalog.touch(filename)
+    return True
 
-        # 更新 post.content
-        post.content = new_body
 
-        # 写回更新后的内容（只覆盖正文，header 不变）
-        f.seek(0)
-        f.write(frontmatter.dumps(post))
-        f.truncate()
-        print(f"Updated {actor}'s main works with {movie}")
+def mainwork_changes(old_movie, new_movie, changes=None):
+    """
+    按关系图的差异计算“主要作品”的变化，合并到 changes {演员: ([删去的标题], [追加的标题])}：
+    不再出演的演员删去旧标题，新出演的演员追加新标题，其余演员不变。
+    """
+    changes = {} if changes is None else changes
+    old_actors = set(movie_actors(old_movie)) if old_movie else set()
+    new_actors = set(movie_actors(new_movie)) if new_movie else set()
+    old_title = old_movie['title'] if old_movie else None
+    new_title = new_movie['title'] if new_movie else None
+    unchanged = old_actors & new_actors if old_title == new_title else set()
+    for actor in old_actors - unchanged:
+        changes.setdefault(actor, ([], []))[0].append(old_title)
+    for actor in new_actors - unchanged:
+        changes.setdefault(actor, ([], []))[1].append(new_title)
+    return changes
+
+
+def sync_mainworks(old_movie, new_movie):
+    """
+    影片的演员或标题变化后，同步演员正文中的“主要作品”。
+    """
+    for actor, (removed, added) in sorted(mainwork_changes(old_movie, new_movie).items()):
+        edit_mainworks(actor, removed, added)
+
+
+def catalog_version(*catalogs):
+    """
+    内容缓存的版本号，先刷新缓存以反映外部修改。
+    版本号由内容指纹得出，与进程无关：多个工作进程之间、重启前后的 ETag 一致。
+    """
+    for catalog in catalogs:
+        catalog.refresh()
+    return '.'.join(f"{catalog.fingerprint:016x}" for catalog in catalogs)
+
+
+def search_version():
+    """
+    检索接口的版本：后台构建完成前结果可能不完整，构建状态也计入版本号。
+    """
+    version = catalog_version(movies_catalog, actors_catalog, posts_catalog)
+    return f"{version}.{int(search_build.ready.is_set())}"
+
+
+def imgbed_version():
+    imgbed_index.refresh()
+    return f"{imgbed_index.fingerprint:016x}"
+
+
+def conditional(get_version, validate=None):
+    """
+    为读接口加上 ETag。客户端缓存仍然有效（If-None-Match）时直接返回 304，不再构建和序列化响应体。
+    get_version() 返回由内容指纹得出的版本号。不发 Last-Modified：按时间判断在文件被删除、
+    进程重启或多个工作进程之间都不可靠。
+    validate(*args, **kwargs) 在判断 304 之前校验请求参数，返回错误响应（400/404）或 None，
+    避免不合法的请求因为内容未变而得到 304。
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if validate is not None:
+                error = validate(*args, **kwargs)
+                if error is not None:
+                    return error
+
+            etag = get_version()
+            if not is_resource_modified(request.environ, etag=etag):
+                response = app.response_class(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
 
 
 @app.route('/imgs/<path:filename>')
 def serve_image(filename):
     """
     提供对 imgs 文件夹中图片的访问。
+    图片所在目录的查找结果有缓存，响应带内容哈希 ETag 和长期缓存头。
+    """
+    if any(part.startswith('.') for part in filename.split('/')):
+        abort(404)  # 不对外提供 .state 等隐藏文件夹
+    if filename.startswith('blobs/'):
+        return serve_blob(filename[len('blobs/'):])
+
+    resolved = image_resolver.resolve(filename)
+    if resolved is not None:
+        try:
+            content_hash = image_resolver.content_hash(safe_join(*resolved))
+        except FileNotFoundError:
+            # 缓存的路径已被删除，下次请求重新查找
+            image_resolver.invalidate(filename)
+            resolved = None
+
+    if resolved is None:
+        # 默认回退到 CONTENT_FOLDER，即使文件不存在也保持原有逻辑
+        return send_from_directory(CONTENT_FOLDER, filename)
+
+    root, filename = resolved
+
+    max_age = image_max_age(content_hash)
+    response = None
+    width = request.args.get('w', type=int)
+    if width:
+        response = send_thumbnail(root, filename, width, content_hash, max_age)
+    if response is None:
+        response = send_from_directory(root, filename, etag=content_hash, max_age=max_age)
+    if max_age == IMMUTABLE_MAX_AGE:
+        response.cache_control.immutable = True
+    return response
+
+
+def serve_blob(blob):
+    """
+    按内容寻址的图片：/imgs/blobs/ab/<sha256>.<ext>，内容永远不变，缓存一年并标记 immutable。
+    """
+    blob_path = blob_store.path(blob)
+    if blob_path is None or not os.path.isfile(blob_path):
+        abort(404)
+    sha256 = os.path.splitext(os.path.basename(blob))[0]
+    response = None
+    width = request.args.get('w', type=int)
+    if width:
+        response = send_thumbnail(blob_store.folder, blob, width, sha256, IMMUTABLE_MAX_AGE)
+    if response is None:
+        response = send_from_directory(blob_store.folder, blob, etag=sha256, max_age=IMMUTABLE_MAX_AGE)
+    response.cache_control.immutable = True
+    return response
+
+
+def image_max_age(content_hash):
+    """
+    图片的浏览器缓存时间：默认 IMAGE_MAX_AGE 秒，过期后凭 ETag 校验；
+    URL 中的 v 参数与内容哈希一致时内容不会再变化，可以永久缓存。
+    """
+    version = request.args.get('v', '')
+    if len(version) >= 8 and content_hash.startswith(version):
+        return IMMUTABLE_MAX_AGE
+    return IMAGE_MAX_AGE
+
+
+def send_thumbnail(root, filename, width, content_hash, max_age):
+    """
+    返回图片缩放到 width 的版本（WebP 或 JPEG），无法生成时返回 None 由调用方返回原图。
+    未指定 format 时根据浏览器的 Accept 头选择 WebP 或 JPEG。
+    """
+    source_path = safe_join(root, filename)
+    if source_path is None or width <= 0:
+        return None
+    fmt = request.args.get('format')
+    negotiated = fmt is None
+    if negotiated:
+        fmt = 'webp' if 'image/webp' in request.headers.get('Accept', '') else 'jpeg'
+    width = thumbnailer.snap_width(width)
+    try:
+        thumbnail_path = thumbnailer.variant(source_path, width, fmt)
+    except Exception as e:
+        print(f"缩略图生成错误 {filename}: {str(e)}")
+        return None
+    if thumbnail_path is None:
+        return None
+    response = send_file(thumbnail_path, etag=f"{content_hash}-w{width}.{fmt}", max_age=max_age)
+    if negotiated:
+        response.vary.add('Accept')
+    return response
+
+
+def save_image_upload(file, image_path):
+    """
+    分块保存上传的图片：校验文件头和大小，存入 blob 存储后原子地把 image_path 链接过去。
+    不合法时抛出 UploadError。返回 {"type", "size", "sha256", "blob"}。
+    """
+    replaced = os.path.exists(image_path)
+    info = blob_store.store(file.stream.read, image_path, UPLOAD_MAX_MB * 1024 * 1024)
+    image_saved(image_path)
+    if replaced:
+        # 覆盖了同名文件，旧内容可能已无引用
+        schedule_blob_gc()
+    return info
+
+
+def collect_blobs():
+    """
+    后台任务：清理没有任何文件名引用的 blob。
+    """
+    blob_gc_scheduled.clear()
+    try:
+        removed = blob_store.gc()
+        if removed:
+            print(f"清理无引用的图片：{removed} 个")
+    except Exception as e:
+        print(f"清理图片错误: {str(e)}")
+
+
+def schedule_blob_gc():
+    if not blob_gc_scheduled.is_set():
+        blob_gc_scheduled.set()
+        threading.Thread(target=collect_blobs, daemon=True).start()
+
+
+def blob_url(info):
+    return f"/imgs/blobs/{info['blob']}"
+
+
+def upload_error(e):
+    """
+    上传被拒绝（UploadError 或请求体超过 MAX_CONTENT_LENGTH）时的响应。
     """
-    print(f"Serving image: {filename}")
-    search_roots = [
-        CONTENT_FOLDER,
-        os.path.join(CONTENT_FOLDER, 'imgbed'),
-        f'{MOVIES_FOLDER}/imgs',
-        f'{ACTORS_FOLDER}/imgs',
-        f'{POSTS_FOLDER}/imgs',
-    ]
+    if isinstance(e, RequestEntityTooLarge):
+        message = f"上传内容过大，单次请求不能超过 {UPLOAD_MAX_REQUEST_MB}MB"
+    else:
+        message = str(e)
+    print(f"上传被拒绝: {message}")
+    return jsonify({"success": False, "message": message}), e.code
 
-    for root in search_roots:
-        if root and os.path.exists(os.path.join(root, filename)):
-            return send_from_directory(root, filename)
 
-    # 默认回退到 CONTENT_FOLDER，即使文件不存在也保持原有逻辑
-    return send_from_directory(CONTENT_FOLDER, filename)
+@app.errorhandler(RequestEntityTooLarge)
+def request_too_large(e):
+    return upload_error(e)
+
+
+def image_saved(image_path):
+    """
+    上传或替换图片后调用：清除路径解析缓存，并在后台生成页面常用尺寸的缩略图。
+    """
+    image_resolver.invalidate()
+    thumbnailer.pregenerate(image_path, THUMBNAIL_PRESET_WIDTHS, formats=('webp',))
+
+
+def parse_fields(value):
+    """
+    解析 fields= 参数（逗号分隔），未指定时返回 None 表示全部字段。
+    """
+    if not value:
+        return None
+    return [field.strip() for field in value.split(',') if field.strip()]
+
+
+def project(record, fields):
+    """
+    只保留 fields 中列出的字段。
+    """
+    if fields is None:
+        return record
+    return {field: record[field] for field in fields if field in record}
+
+
+def encode_cursor(key):
+    return base64.urlsafe_b64encode(json.dumps(list(key), ensure_ascii=False).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    try:
+        return tuple(json.loads(base64.urlsafe_b64decode(cursor.encode('ascii'))))
+    except Exception:
+        raise ValueError(f"invalid cursor: {cursor}")
+
+
+def page_args(scope=''):
+    """
+    解析分页参数 offset/limit/cursor，返回 (limit, offset, 游标中的排序键或 None)。
+    参数为负数、游标无法解码或不属于排序方式 scope 时抛出 ValueError。
+    """
+    limit = request.args.get('limit', type=int)
+    offset = request.args.get('offset', 0, type=int)
+    cursor = request.args.get('cursor')
+    if (limit is not None and limit < 0) or offset < 0:
+        raise ValueError("limit/offset must not be negative")
+    if not cursor:
+        return limit, offset, None
+
+    try:
+        cursor_scope, key = decode_cursor(cursor)
+        key = tuple(key)
+    except TypeError:
+        raise ValueError(f"invalid cursor: {cursor}")
+    if cursor_scope != scope:
+        raise ValueError(f"cursor does not belong to sort {scope!r}")
+    return limit, offset, key
+
+
+def paginate(items, sort_key, reverse=False, scope=''):
+    """
+    按请求参数 offset/limit 或 cursor/limit 对已排好序的 items 分页。
+    游标记录上一页最后一项的排序键，翻页期间有增删也不会重复或遗漏。
+    scope 为排序方式（例如 -rating），一并记入游标：换了排序方式后再使用旧游标时抛出 ValueError。
+    返回 (当前页, 分页信息)。
+    """
+    total = len(items)
+    limit, offset, key = page_args(scope)
+    if key is not None:
+        keys = [sort_key(item) for item in items]
+        try:
+            if reverse:
+                keys.reverse()
+                offset = total - bisect.bisect_left(keys, key)
+            else:
+                offset = bisect.bisect_right(keys, key)
+        except TypeError:
+            raise ValueError(f"cursor does not match sort {scope!r}")
+
+    end = total if limit is None else offset + limit
+    page = items[offset:end]
+    next_cursor = encode_cursor([scope, list(sort_key(page[-1]))]) if page and end < total else None
+    return page, {"total": total, "offset": offset, "limit": limit, "next_cursor": next_cursor}
+
+
+def cursor_matches(key, sort_key):
+    """
+    游标中的排序键与当前排序方式的键结构一致：长度相同，对应位置同为字符串或同为数字。
+    """
+    sample = next(iter(movies_catalog.records()), None)
+    if sample is None:
+        return True
+    expected = sort_key(sample)
+    return len(key) == len(expected) and all(
+        isinstance(value, str) if isinstance(template, str) else isinstance(value, (int, float))
+        for value, template in zip(key, expected))
+
+
+def check_movie_sort(*args, **kwargs):
+    """
+    影片列表接口的 sort 参数校验，由 conditional 在判断 304 之前调用：不支持的排序方式返回 400 响应。
+    """
+    sort = request.args.get('sort', 'order')
+    if sort.lstrip('-') not in MOVIE_SORT_KEYS:
+        return jsonify({"success": False, "message": f"不支持的排序方式: {sort}"}), 400
+    return None
+
+
+def check_movie_page_args(*args, **kwargs):
+    """
+    分页影片列表接口的 sort 与 offset/limit/cursor 参数校验，不合法时返回 400 响应。
+    """
+    error = check_movie_sort()
+    if error is not None:
+        return error
+    sort = request.args.get('sort', 'order')
+    try:
+        _, _, key = page_args(sort)
+    except ValueError:
+        return jsonify({"success": False, "message": "无效的分页参数"}), 400
+    if key is not None and not cursor_matches(key, MOVIE_SORT_KEYS[sort.lstrip('-')]):
+        return jsonify({"success": False, "message": "无效的分页参数"}), 400
+    return None
 
 
 @app.route('/api/movies', methods=['GET'])
+@conditional(lambda: catalog_version(movies_catalog), check_movie_page_args)
 def get_movies():
     """
     API 接口：获取所有影片信息。
     """
-    movies = parse_movie_files()
-    
-    print(f"获取所有影片信息：{len(movies)} movies")
+    args = request.args
+    if not any(key in args for key in ('offset', 'limit', 'cursor', 'sort', 'fields')):
+        movies = parse_movie_files()
+
+        print(f"获取所有影片信息：{len(movies)} movies")
+
+        return jsonify(movies)
 
-    return jsonify(movies)
+    # 支持 sort=order|rating|title（前缀 - 表示倒序）、fields= 字段投影，
+    # 以及 offset/limit 或 cursor/limit 分页
+    sort = args.get('sort', 'order')
+    reverse = sort.startswith('-')
+    sort_key = MOVIE_SORT_KEYS.get(sort.lstrip('-'))
+    if sort_key is None:
+        return jsonify({"success": False, "message": f"不支持的排序方式: {sort}"}), 400
+    fields = parse_fields(args.get('fields'))
+
+    movies = movies_catalog.records(sort_key=sort_key, reverse=reverse)
+    if not any(key in args for key in ('offset', 'limit', 'cursor')):
+        return jsonify([project(movie, fields) for movie in movies])
+
+    try:
+        page, meta = paginate(movies, sort_key, reverse, sort)
+    except ValueError:
+        return jsonify({"success": False, "message": "无效的分页参数"}), 400
+
+    print(f"获取影片信息：{len(page)}/{meta['total']} movies")
+
+    return jsonify({"success": True, "movies": [project(movie, fields) for movie in page], **meta}), 200
 
 @app.route('/api/actors', methods=['GET'])
+@conditional(lambda: catalog_version(actors_catalog))
 def get_actors():
     """
     API 接口：获取所有演员的数据，包括封面路径。
     """
-    actors = parse_actor_files()
+    # 姓名的拼音排序（拼音键按姓名缓存，排序结果随内容缓存复用）
+    actors = actors_catalog.records(actor_sort_key)
     print(f"获取所有演员信息：{len(actors)} actors")
-    # 姓名的拼音排序
-    actors = sorted(actors, key=lambda actor: ''.join(lazy_pinyin(actor['name'])))
     return jsonify(actors), 200
 
+
+@app.route('/api/actors/suggest', methods=['GET'])
+@conditional(search_version)
+def suggest_actors():
+    """
+    API 接口：演员姓名自动补全，q 可以是姓名、拼音全拼或首字母的前缀，例如 zs -> 张三。
+    未指定 q 时按拼音顺序返回前 limit 个演员。索引尚在后台构建时 indexing 为 true，结果可能不完整。
+    """
+    query = request.args.get('q', '').strip().replace(' ', '')
+    limit = max(request.args.get('limit', 10, type=int), 0)
+    if query:
+        actors_catalog.refresh()
+        actors = [actor for actor in map(actors_catalog.get, actor_name_index.lookup(query)) if actor is not None]
+        actors.sort(key=actor_sort_key)
+    else:
+        actors = actors_catalog.records(actor_sort_key)
+
+    suggestions = [{"name": actor['name'], "cover": actor['cover']} for actor in actors[:limit]]
+    return jsonify({"success": True, "actors": suggestions, "total": len(actors),
+                    "indexing": not search_build.ready.is_set()}), 200
+
 @app.route('/api/tags', methods=['GET'])
+@conditional(lambda: catalog_version(movies_catalog))
 def get_tags():
     """
     API 接口：获取所有标签。
     """
-    movies = parse_movie_files()
-    # 统计标签出现次数
-    tag_counts = {}
-    for movie in movies:
-        tags = movie.get('tags', [])
-        for tag in tags:
-            if tag not in tag_counts:
-                tag_counts[tag] = 0
-            tag_counts[tag] += 1
+    # 标签出现次数直接来自倒排索引
+    tag_counts = movie_tag_index.counts()
 
     # 转换为字典列表格式
     tags_list = [{"tag": tag, "count": count} for tag, count in tag_counts.items()]
@@ -249,54 +924,302 @@ def get_tags():
     return jsonify(tags_list), 200
 
 
+# 演员作品列表默认返回的影片字段（不含正文）
+FILMOGRAPHY_FIELDS = ['id', 'title', 'actors', 'tags', 'description', 'cover', 'rating', 'order']
+
+
+@app.route('/api/actor/<actor_name>/movies', methods=['GET'])
+@conditional(lambda: catalog_version(movies_catalog), check_movie_sort)
+def get_actor_movies(actor_name):
+    """
+    API 接口：演员出演的影片，来自关系图索引，只读取该演员相邻的影片。
+    支持 sort=order|rating|title（前缀 - 表示倒序）和 fields= 字段投影。
+    """
+    sort = request.args.get('sort', 'order')
+    sort_key = MOVIE_SORT_KEYS.get(sort.lstrip('-'))
+    if sort_key is None:
+        return jsonify({"success": False, "message": f"不支持的排序方式: {sort}"}), 400
+    fields = parse_fields(request.args.get('fields')) or FILMOGRAPHY_FIELDS
+
+    movies = [movies_catalog.cached(filename) for filename in movie_actor_index.lookup(actor_name)]
+    movies = sorted(filter(None, movies), key=sort_key, reverse=sort.startswith('-'))
+    return jsonify({
+        "success": True,
+        "actor": actor_name,
+        "movies": [project(movie, fields) for movie in movies],
+        "total": len(movies),
+    }), 200
+
+
+@app.route('/api/actor/<actor_name>/costars', methods=['GET'])
+@conditional(lambda: catalog_version(movies_catalog))
+def get_actor_costars(actor_name):
+    """
+    API 接口：与演员合作过的演员及合作影片，按合作次数从多到少排序。
+    只遍历该演员的影片及这些影片的演员（两跳以内的相邻节点）。
+    """
+    costars = {}
+    for filename in movie_actor_index.lookup(actor_name):
+        movie = movies_catalog.cached(filename)
+        if movie is None:
+            continue
+        for costar in movie_actors(movie):
+            if costar != actor_name:
+                costars.setdefault(costar, []).append({"id": movie['id'], "title": movie['title']})
+
+    result = [{"name": name, "count": len(movies), "movies": movies} for name, movies in costars.items()]
+    result.sort(key=lambda item: (-item['count'], item['name']))
+    return jsonify({"success": True, "actor": actor_name, "costars": result, "total": len(result)}), 200
+
+
+@app.route('/api/stats', methods=['GET'])
+@conditional(lambda: catalog_version(movies_catalog, actors_catalog, posts_catalog))
+def get_stats():
+    """
+    API 接口：数据总览。返回总数、评分和喜爱度分布、常用标签、评分最高的影片、最新文章
+    以及各演员的出演影片数，全部来自增量维护的索引，无需返回和遍历完整列表。
+    """
+    tag_counts = sorted(movie_tag_index.counts().items(), key=lambda item: (-item[1], item[0]))
+    actor_counts = sorted(movie_actor_index.counts().items(), key=lambda item: (-item[1], item[0]))
+    rating_counts = movie_rating_index.counts()
+    favorite_counts = actor_favorite_index.counts()
+
+    top_movies = [{
+        "id": movie['id'],
+        "title": movie['title'],
+        "rating": movie['rating'],
+        "cover": movie['cover'],
+    } for movie in movies_catalog.records(movie_rating_key, limit=STATS_TOP_MOVIES)]
+    recent_posts = [{
+        "slug": post['slug'],
+        "title": post['title'],
+        "date": post['date'],
+        "author": post['author'],
+        "excerpt": post['excerpt'],
+    } for post in posts_catalog.records(post_sort_key, reverse=True, limit=STATS_RECENT_POSTS) if post['date']]
+
+    return jsonify({
+        "success": True,
+        "totals": {
+            "movies": movies_catalog.count(),
+            "actors": actors_catalog.count(),
+            "tags": len(tag_counts),
+            "posts": posts_catalog.count(),
+        },
+        "rating_histogram": {str(score): rating_counts.get(score, 0) for score in range(1, 6)},
+        "favorite_histogram": {str(score): favorite_counts.get(score, 0) for score in range(1, 6)},
+        "top_tags": [{"tag": tag, "count": count} for tag, count in tag_counts[:STATS_TOP_TAGS]],
+        "other_tags_count": sum(count for _, count in tag_counts[STATS_TOP_TAGS:]),
+        "top_movies": top_movies,
+        "recent_posts": recent_posts,
+        "actor_movie_counts": [{"actor": actor, "count": count} for actor, count in actor_counts],
+    }), 200
+
+
+def check_actor_exists(actor_name):
+    if actors_catalog.get(f"{actor_name}.md") is None:
+        return jsonify({"error": "Actor not found"}), 404
+    return None
+
+
 @app.route('/api/actor/<actor_name>', methods=['GET'])
+@conditional(lambda: catalog_version(actors_catalog), check_actor_exists)
 def get_actor(actor_name):
     """
     API 接口：获取指定演员的详细信息。
     """
-    file_path = os.path.join(ACTORS_FOLDER, f"{actor_name}.md")
-    if not os.path.exists(file_path):
+    post = actors_catalog.get_post(f"{actor_name}.md")
+    if post is None:
         return jsonify({"error": "Actor not found"}), 404
 
-    with open(file_path, 'r', encoding='utf-8') as f:
-        post = frontmatter.load(f)
-        actor_data = {
-            "name": post.get('name'),
-            "birth": post.get('birth'),
-            "debut": post.get('debut'),
-            "favorite": post.get('favorite', 1),  # 默认喜爱度为1
-            "cover": f"/imgs/{ACTOR_COVER_FOLDER}/{post.get('cover')}",
-            "body": post.content,  # 只返回原始正文内容
-            "x": post.get('x', ''),
-            "instagram": post.get('instagram', ''),
-            "wiki": post.get('wiki', ''),
-        }
-        return jsonify(actor_data)
-    
+    actor_data = {
+        "name": post.get('name'),
+        "birth": post.get('birth'),
+        "debut": post.get('debut'),
+        "favorite": post.get('favorite', 1),  # 默认喜爱度为1
+        "cover": f"/imgs/{ACTOR_COVER_FOLDER}/{post.get('cover')}",
+        "body": post.content,  # 只返回原始正文内容
+        "x": post.get('x', ''),
+        "instagram": post.get('instagram', ''),
+        "wiki": post.get('wiki', ''),
+    }
+    return jsonify(actor_data)
+
+
+def write_fields(catalog, filename, fields):
+    """
+    只更新 front matter 中的指定字段并写回文件。
+    """
+    file_path = os.path.join(catalog.folder, filename)
+    with content_store.edit(file_path) as post:
+        for key, value in fields.items():
+            post[key] = value
+    catalog.touch(filename)
+
+
+def apply_journal_entry(kind, filename, fields):
+    """
+    元数据日志的写回回调。
+    """
+    write_fields(journal_catalogs[kind], filename, fields)
+
+
+# 评分、喜爱度、排行等小改动先记入日志立即返回，由后台线程批量写回文件
+metadata_journal = Journal(os.path.join(STATE_FOLDER, 'metadata-journal.jsonl'), apply_journal_entry,
+                           interval=JOURNAL_FLUSH_INTERVAL)
+journal_catalogs = {'movies': movies_catalog, 'actors': actors_catalog}
+
+
+def journal_fields(kind, changes):
+    """
+    将 {filename: {字段: 值}} 记入元数据日志，并立即更新内存缓存。
+    多进程模式下直接写回文件，保证其他工作进程立即可见。
+    """
+    if not USE_JOURNAL:
+        for filename, fields in changes.items():
+            write_fields(journal_catalogs[kind], filename, fields)
+        return
+    metadata_journal.record_many([(kind, filename, fields) for filename, fields in changes.items()])
+    for filename, fields in changes.items():
+        journal_catalogs[kind].patch(filename, fields)
+
+
+# 串行化排行写入，避免与后台重排交错（多个工作进程之间同样互斥）
+ranking_lock = FileLock(os.path.join(STATE_FOLDER, 'ranking.lock'))
+rebalance_scheduled = threading.Event()
+
+
+def rebalance_orders():
+    """
+    后台任务：按 ORDER_GAP 重新拉开全部影片的 order 间隔，可见顺序不变。
+    """
+    try:
+        with ranking_lock:
+            rebalance_scheduled.clear()
+            movies = parse_movie_files()
+            changes = rebalanced_orders(
+                [movie['id'] for movie in movies],
+                {movie['id']: movie['order'] for movie in movies},
+            )
+            journal_fields('movies', {id: {"order": order} for id, order in changes.items()})
+        print(f"影片排行重排完成：写入 {len(changes)} 个文件")
+    except Exception as e:
+        print(f"影片排行重排错误: {str(e)}")
+
+
+def schedule_rebalance():
+    if not rebalance_scheduled.is_set():
+        rebalance_scheduled.set()
+        threading.Thread(target=rebalance_orders, daemon=True).start()
+
+
+def sequence_changes(sequence):
+    """
+    稀疏模式下为目标顺序计算 order 变化 {id: {"order": 值}}，间隔耗尽时安排后台重排。
+    """
+    orders = {id: movies_catalog.get(id)['order'] for id in sequence}
+    changes, exhausted = sparse_orders(sequence, orders)
+    if exhausted:
+        schedule_rebalance()
+    return {id: {"order": order} for id, order in changes.items()}
+
+
+def ranking_changes(new_ranking):
+    """
+    对比前端提交的排行与当前数据，返回实际需要写入的字段 {id: {字段: 值}}。
+    稀疏模式下只采用提交中的相对顺序，order 的具体数值由服务端分配。
+    """
+    changes = {}
+    for item in new_ranking:
+        movie = movies_catalog.get(item['id'])
+        if movie is None:
+            raise FileNotFoundError(item['id'])
+        keys = ('rating',) if RANKING_MODE == 'sparse' else ('order', 'rating')
+        fields = {}
+        for key in keys:
+            if key in item and movie[key] != item[key]:
+                fields[key] = item[key]
+        if fields:
+            changes[item['id']] = fields
+
+    if RANKING_MODE == 'sparse':
+        # 提交的影片按新顺序填回它们原来占据的位置，其余影片保持不动
+        submitted = sorted(new_ranking, key=lambda item: item.get('order', 0))
+        wanted = {item['id'] for item in submitted}
+        refill = iter(item['id'] for item in submitted)
+        sequence = [next(refill) if movie['id'] in wanted else movie['id'] for movie in parse_movie_files()]
+        for id, fields in sequence_changes(sequence).items():
+            changes.setdefault(id, {}).update(fields)
+    return changes
+
+
+def move_changes(movie_id, position):
+    """
+    将影片移动到排行第 position 位（从 1 开始），返回需要写入的字段 {id: {"order": 值}}。
+    """
+    if movies_catalog.get(movie_id) is None:
+        raise FileNotFoundError(movie_id)
+    ids = [movie['id'] for movie in parse_movie_files() if movie['id'] != movie_id]
+    position = min(max(int(position), 1), len(ids) + 1)
+    ids.insert(position - 1, movie_id)
+
+    if RANKING_MODE == 'sparse':
+        return sequence_changes(ids)
+
+    changes = {}
+    for index, id in enumerate(ids):
+        if movies_catalog.get(id)['order'] != index + 1:
+            changes[id] = {"order": index + 1}
+    return changes
+
+
+def placement_changes(filename, position=None):
+    """
+    新影片插入排行第 position 位（从 1 开始，None 表示末尾）时需要写入的 order {id: 值}，包括新影片自己。
+    稀疏模式下新影片放进相邻影片的间隔中，只有间隔耗尽时才会挪动相邻影片。
+    """
+    ids = [movie['id'] for movie in parse_movie_files() if movie['id'] != filename]
+    position = len(ids) + 1 if position is None else min(max(int(position), 1), len(ids) + 1)
+    if RANKING_MODE != 'sparse':
+        return {filename: position if position <= len(ids) else int(last_movie_order()) + 1}
+
+    orders = {id: movies_catalog.get(id)['order'] for id in ids}
+    orders[filename] = None
+    ids.insert(position - 1, filename)
+    changes, exhausted = sparse_orders(ids, orders)
+    if exhausted:
+        schedule_rebalance()
+    return changes
+
 
 @app.route('/api/update-ranking', methods=['POST'])
 def update_order():
+    """
+    API 接口：更新影片排行，只重写 order/rating 实际发生变化的文件。
+    请求体可以是完整排行 {"ranking": [{"id", "order", "rating"}, ...]}，
+    也可以是单次移动 {"move": {"id": ..., "position": k}}。
+    """
     try:
         data = request.json
-        new_ranking = data.get('ranking')
-
-        for item in new_ranking:
-            file_path = os.path.join(MOVIES_FOLDER, item['id'])
-            if not os.path.exists(file_path):
-                return jsonify({"error": f"File not found: {item['id']}"}), 404
-
-            with open(file_path, 'r+', encoding='utf-8') as f:
-                post = frontmatter.load(f)
-                post['order'] = item['order']
-                post['rating'] = item['rating']
-                f.seek(0)
-                f.write(frontmatter.dumps(post))
-                f.truncate()
-
-        return jsonify({"message": "Order updated successfully"}), 200
+        move = data.get('move')
+
+        with ranking_lock:
+            try:
+                if move:
+                    changes = move_changes(move['id'], move['position'])
+                else:
+                    changes = ranking_changes(data.get('ranking') or [])
+            except FileNotFoundError as e:
+                return jsonify({"error": f"File not found: {e}"}), 404
+
+            journal_fields('movies', changes)
+
+        print(f"更新影片排行：写入 {len(changes)} 个文件")
+
+        return jsonify({"message": "Order updated successfully", "written": len(changes)}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
-    
+
 
 @app.route('/api/create-movie', methods=['POST'])
 def create_movie():
@@ -312,8 +1235,11 @@ def create_movie():
         actors = request.form.get('actors', '')
         tags = request.form.get('tags', '').split(',')  # 将标签字符串转换为列表
         description = request.form.get('description', '')
-        order = request.form.get('order', 1)
+        # order 为排行位置（从 1 开始），留空时排在末尾；具体的 order 数值由服务端分配
+        position = request.form.get('order', '').strip()
         rating = request.form.get('rating', 0)
+        if position and not (position.isdigit() and int(position) >= 1):
+            return jsonify({"success": False, "message": "排行位置必须是正整数"}), 400
 
         # 确保内容文件夹存在
         if not os.path.exists(CONTENT_FOLDER):
@@ -338,7 +1264,7 @@ def create_movie():
                 save_folder = os.path.join(CONTENT_FOLDER, MOVIE_COVER_FOLDER)
                 os.makedirs(save_folder, exist_ok=True)
                 image_path = os.path.join(save_folder, cover_filename)
-                file.save(image_path)
+                save_image_upload(file, image_path)
                 print(f"影片封面图片保存成功: {image_path}")
 
         # 构建 Markdown 文件内容
@@ -348,22 +1274,29 @@ def create_movie():
             "actors": actors,
             "tags": [tag.strip() for tag in tags if tag.strip()],
             "description": description,
-            "order": int(order),
             "rating": int(rating),
             "cover": cover_filename,
         }
 
-        # 写入文件
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(frontmatter.dumps(post))
-
-        for actor in actors.split(','):
-            actor = actor.strip()
-            if actor:
-                append_mainwork(actor, title)
+        # 写入文件（同名影片已存在时覆盖，关系按新旧演员的差异同步）
+        # 先写回日志中该文件的待写入字段，否则之后的写回会用旧的评分、排行覆盖新文件
+        metadata_journal.flush_file('movies', filename)
+        with ranking_lock:
+            old_movie = movies_catalog.get(filename)
+            if old_movie is not None and not position and is_finite_order(old_movie['order']):
+                changes = {filename: old_movie['order']}  # 覆盖已有影片且未指定位置时保持原排行
+            else:
+                changes = placement_changes(filename, int(position) if position else None)
+            post.metadata['order'] = changes.pop(filename)
+            content_store.write(file_path, frontmatter.dumps(post))
+            movies_catalog.touch(filename)
+            journal_fields('movies', {id: {"order": order} for id, order in changes.items()})
+        sync_mainworks(old_movie, movies_catalog.get(filename))
 
         return jsonify({"success": True, "message": "Movie created successfully"}), 200
         
+    except (UploadError, RequestEntityTooLarge) as e:
+        return upload_error(e)
     except Exception as e:
         print(f"创建影片错误: {str(e)}")
         return jsonify({"success": False, "message": f"创建失败: {str(e)}"}), 500
@@ -409,7 +1342,7 @@ def create_actor():
                 save_folder = os.path.join(CONTENT_FOLDER, ACTOR_COVER_FOLDER)
                 os.makedirs(save_folder, exist_ok=True)
                 image_path = os.path.join(save_folder, cover_filename)
-                file.save(image_path)
+                save_image_upload(file, image_path)
                 print(f"演员头像图片保存成功: {image_path}")
 
         # 构建 Markdown 文件内容
@@ -425,12 +1358,15 @@ def create_actor():
             "wiki": wiki_link,
         }
 
-        # 写入文件
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(frontmatter.dumps(post))
+        # 写入文件（同名演员已存在时覆盖；先写回日志中该文件的待写入字段，避免之后被旧值覆盖）
+        metadata_journal.flush_file('actors', filename)
+        content_store.write(file_path, frontmatter.dumps(post))
+        actors_catalog.touch(filename)
 
         return jsonify({"success": True, "message": "Actor created successfully"}), 200
         
+    except (UploadError, RequestEntityTooLarge) as e:
+        return upload_error(e)
     except Exception as e:
         print(f"创建演员错误: {str(e)}")
         return jsonify({"success": False, "message": f"创建失败: {str(e)}"}), 500
@@ -473,8 +1409,8 @@ def create_post():
         }
 
         # 写入文件
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(frontmatter.dumps(post))
+        content_store.write(file_path, frontmatter.dumps(post))
+        posts_catalog.touch(filename)
 
         return jsonify({"success": True, "message": "Post created successfully"}), 200
         
@@ -483,50 +1419,350 @@ def create_post():
         return jsonify({"success": False, "message": f"创建失败: {str(e)}"}), 500
 
 
+def last_movie_order():
+    """
+    当前排行最后一部影片的 order（没有影片时为 0），批量导入的新影片依次排在其后。
+    """
+    orders = [movie['order'] for movie in movies_catalog.records() if is_finite_order(movie['order'])]
+    return max(orders, default=0)
+
+
+def import_rows(rows, kind='movie', overwrite=False):
+    """
+    批量导入影片和演员（生成器）。rows 为 read_rows() 产出的 (行号, 行数据)，kind 为默认类型。
+
+    校验失败的行跳过并记录原因；已存在的文件默认跳过，overwrite 时覆盖。文件按 IMPORT_BATCH_SIZE
+    分批写入，每批只落盘一次、持久化索引只提交一次，并产出一次进度；演员的“主要作品”在全部影片
+    写入后按演员合并更新，每个演员文件最多重写一次。最后产出带 errors 的汇总（done 为 True）。
+    未给出 order 的新影片在每批写入时持有 ranking_lock 分配 order（排在当前末尾），
+    两批之间不持有锁，客户端读取进度较慢时不会阻塞排行写入。
+    """
+    progress = {"processed": 0, "created": 0, "updated": 0, "skipped": 0, "failed": 0}
+    errors = []
+    seen = {}  # (类型, 文件名) -> 行号，同一文件在一次导入中只能出现一次
+    batches = {'actor': {}, 'movie': {}}  # 类型 -> {文件名: frontmatter.Post}
+    mainworks = {}  # 演员 -> ([删去的标题], [追加的标题])
+    order_step = ORDER_GAP if RANKING_MODE == 'sparse' else 1
+
+    def write_batch(catalog, batch):
+        os.makedirs(catalog.folder, exist_ok=True)
+        content_store.write_many([
+            (os.path.join(catalog.folder, filename), frontmatter.dumps(post)) for filename, post in batch.items()
+        ])
+        # 缓存直接使用已有的解析结果，不再重新读取刚写入的文件
+        catalog.put(batch)
+        batch.clear()
+
+    def flush():
+        # 先写演员再写影片，合并“主要作品”时演员文件都已在缓存中
+        if batches['actor']:
+            write_batch(actors_catalog, batches['actor'])
+        if batches['movie']:
+            with ranking_lock:
+                next_order = last_movie_order()
+                for post in batches['movie'].values():
+                    if post.metadata['order'] is None:
+                        next_order += order_step
+                        post.metadata['order'] = next_order
+                write_batch(movies_catalog, batches['movie'])
+
+    for row_number, row in rows:
+        progress['processed'] += 1
+        try:
+            kind_ = row_kind(row, kind)
+            filename, metadata, body = (movie_fields if kind_ == 'movie' else actor_fields)(row)
+            if (kind_, filename) in seen:
+                raise ImportRowError(f"与第 {seen[(kind_, filename)]} 行重复: {filename}")
+        except ImportRowError as e:
+            progress['failed'] += 1
+            if len(errors) < IMPORT_MAX_ERRORS:
+                errors.append({"row": row_number, "message": str(e)})
+            continue
+        seen[(kind_, filename)] = row_number
+
+        journal_kind = 'movies' if kind_ == 'movie' else 'actors'
+        old_record = journal_catalogs[journal_kind].get(filename)
+        if old_record is not None:
+            if not overwrite:
+                progress['skipped'] += 1
+                continue
+            metadata_journal.flush_file(journal_kind, filename)
+
+        if kind_ == 'movie':
+            if metadata['order'] is None and old_record is not None:
+                metadata['order'] = old_record['order']
+            mainwork_changes(old_record, metadata, mainworks)
+
+        post = frontmatter.Post(body)
+        post.metadata = metadata
+        batches[kind_][filename] = post
+        progress['updated' if old_record is not None else 'created'] += 1
+
+        if len(batches['actor']) + len(batches['movie']) >= IMPORT_BATCH_SIZE:
+            flush()
+            yield dict(progress)
+
+    flush()
+    actors_updated = sum(edit_mainworks(actor, removed, added) for actor, (removed, added) in sorted(mainworks.items()))
+    yield {**progress, "actors_updated": actors_updated, "errors": errors, "done": True}
+
+
+@app.route('/api/import', methods=['POST'])
+def import_content():
+    """
+    API 接口：从 CSV/XLSX/JSON Lines 批量导入影片或演员。
+    上传字段 file；参数 type=movie|actor（默认 movie，可被行内的 type 列覆盖），
+    format（默认按扩展名判断），overwrite=1 时覆盖已存在的文件。
+    响应为 NDJSON 流：每写完一批输出一行进度，最后一行为汇总（done 为 true）。
+    """
+    file = request.files.get('file')
+    if file is None or file.filename == '':
+        return jsonify({"success": False, "message": "请上传要导入的文件"}), 400
+    try:
+        fmt = detect_format(file.filename, request.values.get('format'))
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+    kind = request.values.get('type', 'movie')
+    if kind not in ROW_KINDS:
+        return jsonify({"success": False, "message": f"未知的类型: {kind}"}), 400
+    overwrite = request.values.get('overwrite', '0') in ('1', 'true')
+
+    # 请求结束后上传的文件会被关闭，先转存到临时文件，由生成器负责读取和删除
+    upload = tempfile.TemporaryFile()
+    shutil.copyfileobj(file.stream, upload)
+    upload.seek(0)
+
+    def generate():
+        try:
+            with upload:
+                for progress in import_rows(read_rows(upload, fmt), ROW_KINDS[kind], overwrite):
+                    yield json.dumps({"success": True, **progress}, ensure_ascii=False) + '\n'
+        except Exception as e:
+            print(f"批量导入错误: {str(e)}")
+            yield json.dumps({"success": False, "message": f"导入失败: {str(e)}"}, ensure_ascii=False) + '\n'
+
+    return app.response_class(generate(), mimetype='application/x-ndjson')
+
+
+# 导出的类型 -> (内容缓存, 封面文件夹)
+EXPORT_KINDS = {
+    'movie': (movies_catalog, MOVIE_COVER_FOLDER),
+    'actor': (actors_catalog, ACTOR_COVER_FOLDER),
+    'post': (posts_catalog, None),
+}
+
+
+def export_rows(kind):
+    """
+    逐条产出某一类型的导出数据（来自内容缓存，包含尚未写回文件的元数据变更）。
+    """
+    catalog = EXPORT_KINDS[kind][0]
+    for filename, post in catalog.posts():
+        yield export_row(kind, filename, post)
+
+
+def export_files(kinds, covers=True):
+    """
+    逐个产出快照中的 (磁盘路径, 归档内路径)：各类型的 Markdown 文件及其封面，归档内路径相对于 content/。
+    """
+    folders = []
+    for kind in kinds:
+        catalog, cover_folder = EXPORT_KINDS[kind]
+        folders.append(catalog.folder)
+        if covers and cover_folder:
+            folders.append(os.path.join(CONTENT_FOLDER, cover_folder))
+    for folder in folders:
+        for dirpath, dirnames, filenames in os.walk(folder):
+            dirnames[:] = sorted(name for name in dirnames if not name.startswith('.'))
+            for filename in sorted(filenames):
+                if not filename.startswith('.'):
+                    path = os.path.join(dirpath, filename)
+                    yield path, os.path.relpath(path, CONTENT_FOLDER)
+
+
+def export_stream(fmt, kinds, covers=True):
+    """
+    按格式返回导出内容的生成器，数据逐条读取、逐块产出，不在内存中拼出完整结果。
+    CSV 每次只能导出一种类型；XLSX 每种类型一个工作表；tar/zip 为 content/ 的文件快照。
+    """
+    if fmt == 'ndjson':
+        return ndjson_stream(row for kind in kinds for row in export_rows(kind))
+    if fmt == 'csv':
+        if len(kinds) != 1:
+            raise ValueError("CSV 每次只能导出一种类型")
+        return csv_stream(export_rows(kinds[0]), EXPORT_COLUMNS[kinds[0]])
+    if fmt == 'xlsx':
+        return xlsx_stream([(f"{kind}s", EXPORT_COLUMNS[kind], export_rows(kind)) for kind in kinds])
+    # 快照直接读取文件，先写回元数据日志中尚未落盘的变更
+    metadata_journal.flush()
+    return archive_stream(export_files(kinds, covers), fmt)
+
+
+def parse_export_kinds(value):
+    kinds = [ROW_KINDS.get(kind, kind.rstrip('s')) for kind in parse_fields(value) or ['movie', 'actor', 'post']]
+    unknown = [kind for kind in kinds if kind not in EXPORT_KINDS]
+    if unknown:
+        raise ValueError(f"未知的类型: {', '.join(unknown)}")
+    return list(dict.fromkeys(kinds))
+
+
+@app.route('/api/export', methods=['GET'])
+def export_content():
+    """
+    API 接口：流式导出影片、演员和博客文章。
+    参数：format=ndjson|csv|xlsx|tar|zip（默认 ndjson），type=movie,actor,post（默认全部，CSV 只能一种），
+    covers=0 时 tar/zip 不包含封面图片。
+    """
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"success": False, "message": f"不支持的导出格式: {fmt}"}), 400
+    try:
+        kinds = parse_export_kinds(request.args.get('type'))
+        stream = export_stream(fmt, kinds, request.args.get('covers', '1') != '0')
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    extension, mimetype = EXPORT_FORMATS[fmt]
+    filename = f"movie-ranking-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{extension}"
+    response = app.response_class(stream, mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    print(f"导出内容：{fmt} {','.join(kinds)}")
+    return response
+
+
 @app.route('/api/movie/<movie_name>', methods=['GET'])
+@conditional(lambda: catalog_version(movies_catalog))
 def get_movie_by_name(movie_name):
     """
     API 接口：根据电影名称获取影片详细信息 [[3]]。
     """
-    for filename in os.listdir(MOVIES_FOLDER):
-        if filename.endswith('.md'):
-            file_path = os.path.join(MOVIES_FOLDER, filename)
-            with open(file_path, 'r', encoding='utf-8') as f:
-                post = frontmatter.load(f)
-                if post.get('title') == movie_name:  # 匹配电影标题 [[3]]
-                    return jsonify({
-                        "id": filename,
-                        "title": post.get('title'),
-                        "actors": post.get('actors', ''),
-                        "tags": post.get('tags', []),
-                        "description": post.get('description', ''),
-                        "cover": f"/imgs/{MOVIE_COVER_FOLDER}/{post.get('cover')}",
-                        "rating": post.get('rating', 0),
-                        "body": post.content,  # 只返回原始正文内容
-                    })
-    return jsonify({
-        "id": None,
-        "title": movie_name,
-        "actors": '',
-        "tags": [],
-        "description": '待观看',
-        "cover": '/imgs/default_cover.jpg',
-        "rating": 0,
-        "body": '',
-    })
+    return jsonify(find_movie_card(movie_name))
+
+
+def tagged_version():
+    # 带 q 时结果来自全文索引，后台构建完成前后结果不同
+    return search_version() if request.args.get('q', '').strip() else catalog_version(movies_catalog)
+
+
+@app.route('/api/movies/tagged', methods=['GET'])
+@conditional(tagged_version, check_movie_page_args)
+def get_movies_by_tags():
+    """
+    API 接口：多条件组合查询影片（影片管理页的筛选也由这里完成，而不是在已加载的几页里过滤）。
+    参数：all=必须全部包含的标签，any=至少包含其一的标签，not=不能包含的标签，
+    actors=至少由其一出演的演员（均为逗号分隔），q=全文搜索关键词，min_rating/max_rating=评分区间，
+    以及与 /api/movies 相同的 sort、fields、offset/limit、cursor 参数。
+    """
+    args = request.args
+    all_tags = parse_fields(args.get('all')) or []
+    any_tags = parse_fields(args.get('any')) or []
+    not_tags = parse_fields(args.get('not')) or []
+    actors = parse_fields(args.get('actors')) or []
+    query = args.get('q', '').strip()
+    min_rating = args.get('min_rating', type=float)
+    max_rating = args.get('max_rating', type=float)
+
+    sort = args.get('sort', 'order')
+    reverse = sort.startswith('-')
+    sort_key = MOVIE_SORT_KEYS.get(sort.lstrip('-'))
+    if sort_key is None:
+        return jsonify({"success": False, "message": f"不支持的排序方式: {sort}"}), 400
+    fields = parse_fields(args.get('fields'))
+
+    movies_catalog.refresh()
+    sets = [movie_tag_index.members(tag) for tag in all_tags]
+    if any_tags:
+        sets.append(set().union(*(movie_tag_index.members(tag) for tag in any_tags)))
+    if actors:
+        sets.append(set().union(*(movie_actor_index.members(actor) for actor in actors)))
+    if query:
+        sets.append({doc_id for (_, doc_id), _ in search_index.search(query, {'movie'})})
+    excluded = set().union(*(movie_tag_index.members(tag) for tag in not_tags))
+    if sets:
+        # 从最小的集合开始求交集
+        sets.sort(key=len)
+        result = sets[0].intersection(*sets[1:]) - excluded
+        # 查询索引与读取记录之间文件可能已被删除，跳过已不存在的记录
+        movies = [movie for movie in map(movies_catalog.get, result) if movie is not None]
+    else:
+        movies = [movie for movie in movies_catalog.records() if movie['id'] not in excluded]
+    if min_rating is not None or max_rating is not None:
+        low = -math.inf if min_rating is None else min_rating
+        high = math.inf if max_rating is None else max_rating
+        movies = [movie for movie in movies if low <= (movie['rating'] or 0) <= high]
+    movies.sort(key=sort_key, reverse=reverse)
+    try:
+        page, meta = paginate(movies, sort_key, reverse, sort)
+    except ValueError:
+        return jsonify({"success": False, "message": "无效的分页参数"}), 400
+
+    print(f"多标签查询影片：{len(page)}/{meta['total']} movies")
+
+    return jsonify({"success": True, "movies": [project(movie, fields) for movie in page], **meta}), 200
+
+
+def check_movie_exists(id):
+    if movies_catalog.get(id) is None:
+        return jsonify({"success": False, "message": "影片未找到"}), 404
+    return None
+
 
+@app.route('/api/movies/<id>', methods=['GET'])
+@conditional(lambda: catalog_version(movies_catalog), check_movie_exists)
+def get_movie(id):
+    """
+    API 接口：根据文件名（id）获取单部影片，并附带排行中的前后影片。
+    """
+    try:
+        movie = movies_catalog.get(id)
+        if movie is None:
+            return jsonify({"success": False, "message": "影片未找到"}), 404
+
+        prev_movie, next_movie = movies_catalog.neighbours(id, movie_sort_key)
+        return jsonify({
+            "success": True,
+            "movie": movie,
+            "prev": {"id": prev_movie['id'], "title": prev_movie['title']} if prev_movie else None,
+            "next": {"id": next_movie['id'], "title": next_movie['title']} if next_movie else None,
+        }), 200
+    except Exception as e:
+        print(f"获取影片错误: {str(e)}")
+        return jsonify({"success": False, "message": f"获取失败: {str(e)}"}), 500
+
+
+@app.route('/api/movies/batch', methods=['POST'])
+def get_movies_by_names():
+    """
+    API 接口：批量根据电影名称获取影片卡片，未收录的影片返回占位卡片。
+    请求体：{"titles": ["影片A", "影片B", ...]}，返回顺序与请求一致。
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        titles = data.get('titles', [])
+        if not isinstance(titles, list):
+            return jsonify({"success": False, "message": "titles 必须是列表"}), 400
 
+        # 只刷新一次内容缓存，之后逐个走标题索引
+        movies_catalog.refresh()
+        movies = [find_movie_card(str(title), refresh=False) for title in titles]
+
+        print(f"批量获取影片信息：{len(movies)} movies")
+
+        return jsonify({"success": True, "movies": movies}), 200
+    except Exception as e:
+        print(f"批量获取影片错误: {str(e)}")
+        return jsonify({"success": False, "message": f"获取失败: {str(e)}"}), 500
 
 
 @app.route('/api/tags/<tag_name>', methods=['GET'])
+@conditional(lambda: catalog_version(movies_catalog))
 def get_movies_by_tag(tag_name):
     """
     API 接口：获取包含指定标签的所有影片。
     """
-    movies = parse_movie_files()
-    
-    # 筛选包含指定标签的影片
-    filtered_movies = [movie for movie in movies if tag_name in movie.get('tags', [])]
+    # 通过标签倒排索引取出影片，无需逐部筛选；查询后已被删除的文件跳过
+    movies = map(movies_catalog.get, movie_tag_index.lookup(tag_name))
+    filtered_movies = sorted(filter(None, movies), key=movie_sort_key)
     
     print(f"获取包含标签 '{tag_name}' 的影片：{len(filtered_movies)} movies")
 
@@ -549,7 +1785,7 @@ def update_movie(id):
             tags = tags.split(',')
         description = request.form.get('description', '')
         rating = request.form.get('rating', 0)
-        order = request.form.get('order', 1)
+        order = request.form.get('order')
         
         file_path = os.path.join(MOVIES_FOLDER, id)
 
@@ -571,11 +1807,12 @@ def update_movie(id):
                 save_folder = os.path.join(CONTENT_FOLDER, MOVIE_COVER_FOLDER)
                 os.makedirs(save_folder, exist_ok=True)
                 image_path = os.path.join(save_folder, cover_filename)
-                file.save(image_path)
+                save_image_upload(file, image_path)
                 print(f"影片封面图片更新成功: {image_path}")
 
-        with open(file_path, 'r+', encoding='utf-8') as f:
-            post = frontmatter.load(f)
+        metadata_journal.flush_file('movies', id)
+        old_movie = movies_catalog.get(id)
+        with content_store.edit(file_path) as post:
             post['title'] = title
             post['actors'] = actors
             post['tags'] = [tag.strip() for tag in tags if tag.strip()]
@@ -583,13 +1820,17 @@ def update_movie(id):
                 post['cover'] = cover_filename
             post['description'] = description
             post['rating'] = int(rating)
-            post['order'] = int(order)
-            f.seek(0)
-            f.write(frontmatter.dumps(post))
-            f.truncate()
+            # 排行只通过排行接口调整；旧客户端回传的 order 与当前值相同时保持原值，避免稀疏 order 被改写
+            if order not in (None, '') and float(order) != post.get('order'):
+                post['order'] = int(float(order))
+        movies_catalog.touch(id)
+        # 演员或标题变化时同步演员正文中的“主要作品”，移除过期的关系
+        sync_mainworks(old_movie, movies_catalog.get(id))
 
         return jsonify({"success": True, "message": "影片信息更新成功"}), 200
         
+    except (UploadError, RequestEntityTooLarge) as e:
+        return upload_error(e)
     except Exception as e:
         print(f"更新影片错误: {str(e)}")
         return jsonify({"success": False, "message": f"更新失败: {str(e)}"}), 500
@@ -609,13 +1850,10 @@ def update_movie_body(id):
         if not os.path.exists(file_path):
             return jsonify({"success": False, "message": "影片文件不存在"}), 404
         
-        with open(file_path, 'r+', encoding='utf-8') as f:
-            post = frontmatter.load(f)
+        metadata_journal.flush_file('movies', id)
+        with content_store.edit(file_path) as post:
             post.content = body_content
-            
-            f.seek(0)
-            f.write(frontmatter.dumps(post))
-            f.truncate()
+        movies_catalog.touch(id)
         
         return jsonify({"success": True, "message": "正文内容更新成功"}), 200
         
@@ -642,14 +1880,8 @@ def update_movie_rating(id):
         if not os.path.exists(file_path):
             return jsonify({"success": False, "message": "影片文件不存在"}), 404
         
-        # 只更新评分字段，保持其他字段不变
-        with open(file_path, 'r+', encoding='utf-8') as f:
-            post = frontmatter.load(f)
-            post['rating'] = int(rating)
-            
-            f.seek(0)
-            f.write(frontmatter.dumps(post))
-            f.truncate()
+        # 只更新评分字段：记入元数据日志后立即返回，由后台批量写回文件
+        journal_fields('movies', {id: {'rating': int(rating)}})
         
         return jsonify({"success": True, "message": "评分更新成功", "rating": rating}), 200
         
@@ -672,13 +1904,10 @@ def update_actor_body(actor_name):
         if not os.path.exists(file_path):
             return jsonify({"success": False, "message": "演员文件不存在"}), 404
         
-        with open(file_path, 'r+', encoding='utf-8') as f:
-            post = frontmatter.load(f)
+        metadata_journal.flush_file('actors', f"{actor_name}.md")
+        with content_store.edit(file_path) as post:
             post.content = body_content
-            
-            f.seek(0)
-            f.write(frontmatter.dumps(post))
-            f.truncate()
+        actors_catalog.touch(f"{actor_name}.md")
         
         return jsonify({"success": True, "message": "正文内容更新成功"}), 200
         
@@ -728,11 +1957,11 @@ def update_actor(actor_name):
                 save_folder = os.path.join(CONTENT_FOLDER, ACTOR_COVER_FOLDER)
                 os.makedirs(save_folder, exist_ok=True)
                 image_path = os.path.join(save_folder, cover_filename)
-                file.save(image_path)
+                save_image_upload(file, image_path)
                 print(f"演员封面图片更新成功: {image_path}")
 
-        with open(file_path, 'r+', encoding='utf-8') as f:
-            post = frontmatter.load(f)
+        metadata_journal.flush_file('actors', f"{actor_name}.md")
+        with content_store.edit(file_path) as post:
             post['name'] = name
             post['birth'] = birth
             post['debut'] = debut
@@ -743,13 +1972,12 @@ def update_actor(actor_name):
             post['x'] = x_link
             post['instagram'] = instagram_link
             post['wiki'] = wiki_link
-
-            f.seek(0)
-            f.write(frontmatter.dumps(post))
-            f.truncate()
+        actors_catalog.touch(f"{actor_name}.md")
 
         return jsonify({"success": True, "message": "演员信息更新成功"}), 200
         
+    except (UploadError, RequestEntityTooLarge) as e:
+        return upload_error(e)
     except Exception as e:
         print(f"更新演员错误: {str(e)}")
         return jsonify({"success": False, "message": f"更新失败: {str(e)}"}), 500
@@ -773,13 +2001,8 @@ def update_actor_favorite(actor_name):
         if not os.path.exists(file_path):
             return jsonify({"success": False, "message": "演员文件不存在"}), 404
         
-        with open(file_path, 'r+', encoding='utf-8') as f:
-            post = frontmatter.load(f)
-            post['favorite'] = favorite
-            
-            f.seek(0)
-            f.write(frontmatter.dumps(post))
-            f.truncate()
+        # 记入元数据日志后立即返回，由后台批量写回文件
+        journal_fields('actors', {f"{actor_name}.md": {'favorite': favorite}})
         
         return jsonify({"success": True, "message": "喜爱度更新成功"}), 200
         
@@ -802,13 +2025,9 @@ def update_post_body(slug):
         if not os.path.exists(file_path):
             return jsonify({"success": False, "message": "文章文件不存在"}), 404
         
-        with open(file_path, 'r+', encoding='utf-8') as f:
-            post = frontmatter.load(f)
+        with content_store.edit(file_path) as post:
             post.content = body_content
-            
-            f.seek(0)
-            f.write(frontmatter.dumps(post))
-            f.truncate()
+        posts_catalog.touch(f"{slug}.md")
         
         return jsonify({"success": True, "message": "正文内容更新成功"}), 200
         
@@ -855,11 +2074,10 @@ def update_post(slug):
                 save_folder = os.path.join(CONTENT_FOLDER, POST_COVER_FOLDER)
                 os.makedirs(save_folder, exist_ok=True)
                 image_path = os.path.join(save_folder, cover_filename)
-                file.save(image_path)
+                save_image_upload(file, image_path)
                 print(f"文章封面图片更新成功: {image_path}")
 
-        with open(file_path, 'r+', encoding='utf-8') as f:
-            post = frontmatter.load(f)
+        with content_store.edit(file_path) as post:
             post['title'] = title
             post['author'] = author
             post['date'] = date
@@ -867,13 +2085,12 @@ def update_post(slug):
             post['tags'] = [tag.strip() for tag in tags if tag.strip()]
             if cover_filename:
                 post['cover'] = cover_filename
-
-            f.seek(0)
-            f.write(frontmatter.dumps(post))
-            f.truncate()
+        posts_catalog.touch(f"{slug}.md")
 
         return jsonify({"success": True, "message": "文章信息更新成功"}), 200
         
+    except (UploadError, RequestEntityTooLarge) as e:
+        return upload_error(e)
     except Exception as e:
         print(f"更新文章错误: {str(e)}")
         return jsonify({"success": False, "message": f"更新失败: {str(e)}"}), 500
@@ -934,8 +2151,13 @@ def upload_image():
         os.makedirs(save_folder, exist_ok=True)
 
         # 保存文件（如果存在同名文件则覆盖）
-        file_path = os.path.join(save_folder, filename)
-        file.save(file_path)
+        if image_type == 'imgbed':
+            file_path = imgbed_index.path_for(filename)
+        else:
+            file_path = os.path.join(save_folder, filename)
+        info = save_image_upload(file, file_path)
+        if image_type == 'imgbed':
+            imgbed_index.notify(filename)
 
         print(f"图片上传成功: {file_path}")
 
@@ -953,64 +2175,171 @@ def upload_image():
             "success": True,
             "message": "图片上传成功",
             "filename": filename,
-            "path": return_path
+            "path": return_path,
+            "blob": blob_url(info),
         }), 200
 
+    except (UploadError, RequestEntityTooLarge) as e:
+        return upload_error(e)
     except Exception as e:
         print(f"图片上传错误: {str(e)}")
         return jsonify({"success": False, "message": f"上传失败: {str(e)}"}), 500
 
 
-@app.route('/api/imgbed', methods=['GET'])
-def get_imgbed_images():
+@app.route('/api/upload-images', methods=['POST'])
+def upload_images():
     """
-    API 接口：获取图床中的所有图片列表。
+    API 接口：一次上传多张图床图片（表单字段 images 可重复），逐个返回结果，同名文件会被覆盖。
     """
     try:
-        images = []
+        files = request.files.getlist('images')
+        if not files:
+            return jsonify({"success": False, "message": "没有选择图片文件"}), 400
 
-        # 确保图床文件夹存在
-        if not os.path.exists(IMGBED_FOLDER):
-            os.makedirs(IMGBED_FOLDER, exist_ok=True)
-            return jsonify({
+        results = []
+        for file in files:
+            filename = os.path.basename(file.filename or '')
+            if not filename or not allowed_extension(filename):
+                results.append({"filename": filename, "success": False, "message": "不支持的文件类型"})
+                continue
+            try:
+                info = save_image_upload(file, imgbed_index.path_for(filename))
+                imgbed_index.notify(filename)
+            except UploadError as e:
+                results.append({"filename": filename, "success": False, "message": str(e)})
+                continue
+            results.append({
+                "filename": filename,
                 "success": True,
-                "images": []
-            }), 200
+                "path": f"/imgs/imgbed/{filename}",
+                "blob": blob_url(info),
+                "size": info['size'],
+                "sha256": info['sha256'],
+            })
 
-        # 支持的图片扩展名
-        allowed_extensions = {'.png', '.jpg', '.jpeg', '.gif', '.webp'}
+        saved = sum(1 for result in results if result['success'])
+        print(f"批量上传图片：{saved}/{len(files)} 张成功")
 
-        # 遍历图床文件夹中的所有文件
-        for filename in os.listdir(IMGBED_FOLDER):
-            file_path = os.path.join(IMGBED_FOLDER, filename)
+        return jsonify({"success": saved == len(files), "results": results}), 200
 
-            # 只处理文件，跳过目录
-            if not os.path.isfile(file_path):
-                continue
+    except RequestEntityTooLarge as e:
+        return upload_error(e)
+    except Exception as e:
+        print(f"批量上传图片错误: {str(e)}")
+        return jsonify({"success": False, "message": f"上传失败: {str(e)}"}), 500
 
-            # 检查文件扩展名
-            _, ext = os.path.splitext(filename)
-            if ext.lower() not in allowed_extensions:
-                continue
 
-            # 获取文件信息
-            file_stat = os.stat(file_path)
-            file_size = file_stat.st_size
-            modified_time = file_stat.st_mtime
+@app.route('/api/imgbed/uploads', methods=['POST'])
+def create_imgbed_upload():
+    """
+    API 接口：创建图床的断点续传任务，请求体为 {"filename": 文件名, "size": 字节数}。
+    """
+    data = request.json or {}
+    filename = os.path.basename(str(data.get('filename', '')))
+    try:
+        upload_id = resumable_uploads.create(filename, data.get('size'))
+    except UploadError as e:
+        return upload_error(e)
+    return jsonify({"success": True, "upload_id": upload_id, "offset": 0}), 200
 
-            images.append({
-                "filename": filename,
-                "path": f"/imgs/imgbed/{filename}",
-                "size": file_size,
-                "modified_time": modified_time
-            })
 
-        # 按修改时间降序排序（最新的在前面）
-        images.sort(key=lambda x: x['modified_time'], reverse=True)
+@app.route('/api/imgbed/uploads/<upload_id>', methods=['GET', 'PUT', 'DELETE'])
+def imgbed_upload(upload_id):
+    """
+    API 接口：断点续传。
+    GET 查询服务器已接收的偏移；PUT 以原始字节追加一块数据，请求头 Upload-Offset 为这块数据的起始偏移，
+    全部到达后校验并保存到图床；DELETE 取消上传。
+    """
+    try:
+        if request.method == 'GET':
+            return jsonify({"success": True, **resumable_uploads.status(upload_id)}), 200
+        if request.method == 'DELETE':
+            resumable_uploads.abort(upload_id)
+            return jsonify({"success": True, "message": "已取消上传"}), 200
+
+        offset = request.headers.get('Upload-Offset', type=int)
+        if offset is None:
+            raise UploadError("缺少 Upload-Offset 请求头")
+        offset = resumable_uploads.append(upload_id, offset, request.stream.read)
+        status = resumable_uploads.status(upload_id)
+        if offset < status['size']:
+            return jsonify({"success": True, "offset": offset, "size": status['size'], "complete": False}), 200
+
+        filename = status['filename']
+        file_path = imgbed_index.path_for(filename)
+        replaced = os.path.exists(file_path)
+        info = resumable_uploads.finish(upload_id, file_path)
+        imgbed_index.notify(filename)
+        image_saved(file_path)
+        if replaced:
+            schedule_blob_gc()
+        print(f"断点续传上传成功: {file_path}")
 
         return jsonify({
             "success": True,
-            "images": images
+            "offset": offset,
+            "size": status['size'],
+            "complete": True,
+            "filename": filename,
+            "path": f"/imgs/imgbed/{filename}",
+            "blob": blob_url(info),
+            "sha256": info['sha256'],
+        }), 200
+
+    except (UploadError, RequestEntityTooLarge) as e:
+        return upload_error(e)
+    except Exception as e:
+        print(f"断点续传错误: {str(e)}")
+        return jsonify({"success": False, "message": f"上传失败: {str(e)}"}), 500
+
+
+def check_imgbed_args():
+    """
+    图床列表的分页参数校验，由 conditional 在判断 304 之前调用，不合法时返回 400 响应。
+    """
+    limit = request.args.get('limit', type=int)
+    offset = request.args.get('offset', 0, type=int)
+    cursor = request.args.get('cursor')
+    try:
+        if (limit is not None and limit < 0) or offset < 0:
+            raise ValueError("limit/offset must not be negative")
+        if cursor:
+            decode_cursor(cursor)
+    except ValueError:
+        return jsonify({"success": False, "message": "分页参数不正确"}), 400
+    return None
+
+
+@app.route('/api/imgbed', methods=['GET'])
+@conditional(imgbed_version, check_imgbed_args)
+def get_imgbed_images():
+    """
+    API 接口：获取图床图片列表（按修改时间倒序，最新的在前面）。
+    支持 offset/limit 或 cursor/limit 分页，以及 q=文件名关键词；不带参数时返回全部图片。
+    """
+    try:
+        limit = request.args.get('limit', type=int)
+        offset = request.args.get('offset', 0, type=int)
+        cursor = request.args.get('cursor')
+        after = decode_cursor(cursor) if cursor else None
+
+        items, total = imgbed_index.page(after, offset, limit, request.args.get('q', '').strip())
+        images = [{
+            "filename": filename,
+            "path": f"/imgs/imgbed/{filename}",
+            "size": size,
+            "modified_time": modified_time,
+        } for _, filename, modified_time, size in items]
+        more = limit is not None and len(items) == limit and (after is not None or offset + limit < total)
+        next_cursor = encode_cursor(items[-1][0]) if items and more else None
+
+        return jsonify({
+            "success": True,
+            "images": images,
+            "total": total,
+            "offset": offset,
+            "limit": limit,
+            "next_cursor": next_cursor,
         }), 200
 
     except Exception as e:
@@ -1019,6 +2348,7 @@ def get_imgbed_images():
 
 
 @app.route('/api/posts', methods=['GET'])
+@conditional(lambda: catalog_version(posts_catalog))
 def get_posts():
     """
     API 接口：获取所有博客文章列表。
@@ -1034,7 +2364,14 @@ def get_posts():
         return jsonify({"success": False, "message": f"获取失败: {str(e)}"}), 500
 
 
+def check_post_exists(slug):
+    if get_post_by_slug(slug) is None:
+        return jsonify({"success": False, "message": "文章未找到"}), 404
+    return None
+
+
 @app.route('/api/posts/<slug>', methods=['GET'])
+@conditional(lambda: catalog_version(posts_catalog), check_post_exists)
 def get_post(slug):
     """
     API 接口：根据slug获取特定的博客文章。
@@ -1056,6 +2393,51 @@ def get_post(slug):
         return jsonify({"success": False, "message": f"获取失败: {str(e)}"}), 500
 
 
+@app.route('/api/search', methods=['GET'])
+@conditional(search_version)
+def search():
+    """
+    API 接口：全文搜索影片、演员和博客文章的标题、简介与正文，支持拼音检索标题。
+    参数：q=关键词，type=movie,actor,post（可选），offset/limit 分页（默认前 20 条）。
+    索引尚在后台构建时 indexing 为 true，结果可能不完整。
+    """
+    try:
+        query = request.args.get('q', '').strip()
+        kinds = set(parse_fields(request.args.get('type')) or [])
+        offset = max(request.args.get('offset', 0, type=int), 0)
+        limit = max(request.args.get('limit', 20, type=int), 0)
+        indexing = not search_build.ready.is_set()
+        if not query:
+            return jsonify({"success": True, "results": [], "total": 0, "indexing": indexing}), 200
+
+        matches = search_index.search(query, kinds)
+        results = []
+        for (kind, doc_id), score in matches[offset:offset + limit]:
+            if kind == 'movie':
+                record = movies_catalog.get(doc_id)
+            elif kind == 'actor':
+                record = actors_catalog.get(f"{doc_id}.md")
+            else:
+                record = posts_catalog.get(f"{doc_id}.md")
+            if record is None:
+                continue
+            results.append({
+                "type": kind,
+                "id": doc_id,
+                "title": record.get('title', record.get('name')),
+                "cover": record.get('cover'),
+                "score": score,
+                "snippet": search_index.snippet((kind, doc_id), query),
+            })
+
+        print(f"搜索 '{query}'：{len(matches)} results")
+
+        return jsonify({"success": True, "results": results, "total": len(matches), "indexing": indexing}), 200
+    except Exception as e:
+        print(f"搜索错误: {str(e)}")
+        return jsonify({"success": False, "message": f"搜索失败: {str(e)}"}), 500
+
+
 @app.route('/api/login', methods=['POST'])
 def login():
     """
@@ -1105,5 +2487,112 @@ def login():
         }), 500
 
 
+# 重放上次未写回的元数据日志，再预先解析全部内容，首个请求无需等待
+if USE_JOURNAL:
+    metadata_journal.replay()
+    # 启动时的无引用 blob 清理只由持有日志锁的服务进程进行：
+    # 多工作进程时不在每个进程里重复清理（覆盖图片时仍会触发），CLI 命令在服务运行期间也不会清理
+    schedule_blob_gc()
+elif journal_owner.acquire(blocking=False):
+    # 不使用日志的进程：遗留的日志已无进程持有，写回文件后释放锁
+    try:
+        metadata_journal.replay()
+        metadata_journal.flush()
+    finally:
+        journal_owner.release()
+else:
+    print("元数据日志由其他进程持有，本进程直接写文件")
+for catalog in (movies_catalog, actors_catalog, posts_catalog):
+    catalog.refresh()
+imgbed_index.refresh()
+metadata_journal.start()
+search_build.start()
+
+# 监听内容文件夹，外部修改直接推送到缓存，读取时无需重新扫描目录
+content_watcher = ContentWatcher()
+if WATCH_CONTENT:
+    for catalog in (movies_catalog, actors_catalog, posts_catalog):
+        content_watcher.watch(catalog.folder, catalog.notify)
+    # 图床索引随文件变化增量更新
+    os.makedirs(IMGBED_FOLDER, exist_ok=True)
+    content_watcher.watch(IMGBED_FOLDER, imgbed_index.notify, recursive=True)
+    # 图片文件夹的任何变化都清空路径解析缓存（只监听已存在的文件夹，不主动创建）
+    image_folders = IMAGE_ROOTS[1:] + [os.path.join(CONTENT_FOLDER, COVER_FOLDER)]
+    content_watcher.watch(CONTENT_FOLDER, lambda filename: image_resolver.invalidate())
+    for folder in filter(os.path.isdir, image_folders):
+        content_watcher.watch(folder, lambda filename: image_resolver.invalidate(), recursive=True)
+    if content_watcher.start():
+        for catalog in (movies_catalog, actors_catalog, posts_catalog):
+            catalog.rescan_interval = WATCH_RESCAN_INTERVAL
+        imgbed_index.rescan_interval = WATCH_RESCAN_INTERVAL
+        if all(map(os.path.isdir, image_folders)):
+            # 全部图片文件夹都在监听中，解析结果无需过期
+            image_resolver.ttl = None
+atexit.register(metadata_journal.flush)
+
+
+@app.cli.command('dedupe-images')
+def dedupe_images():
+    """
+    把已有的封面和图床图片纳入 blob 存储，内容相同的文件合并为一份，并清理无引用的 blob。
+    用法：flask --app app dedupe-images
+    """
+    blobs = []
+    for folder in (os.path.join(CONTENT_FOLDER, COVER_FOLDER), IMGBED_FOLDER):
+        for dirpath, dirnames, filenames in os.walk(folder):
+            dirnames[:] = [name for name in dirnames if not name.startswith('.')]
+            for filename in filenames:
+                if filename.startswith('.') or not allowed_extension(filename):
+                    continue
+                blob = blob_store.adopt(os.path.join(dirpath, filename))
+                if blob is not None:
+                    blobs.append(blob)
+    image_resolver.invalidate()
+    print(f"已纳入 blob 存储：{len(blobs)} 个文件，{len(set(blobs))} 份不同内容")
+    print(f"清理无引用的 blob：{blob_store.gc()} 个")
+
+
+@app.cli.command('import-content')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--type', 'kind', type=click.Choice(['movie', 'actor']), default='movie', help='默认类型')
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'xlsx', 'jsonl']), default=None, help='默认按扩展名判断')
+@click.option('--overwrite', is_flag=True, help='覆盖已存在的文件')
+def import_content_command(path, kind, fmt, overwrite):
+    """
+    从 CSV/XLSX/JSON Lines 批量导入影片或演员。
+    用法：flask --app app import-content movies.csv [--type actor] [--overwrite]
+    """
+    try:
+        fmt = detect_format(path, fmt)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+    with open(path, 'rb') as f:
+        for progress in import_rows(read_rows(f, fmt), kind, overwrite):
+            print(f"已处理 {progress['processed']} 行：新增 {progress['created']}，覆盖 {progress['updated']}，"
+                  f"跳过 {progress['skipped']}，失败 {progress['failed']}")
+    for error in progress['errors']:
+        print(f"第 {error['row']} 行：{error['message']}")
+    print(f"更新主要作品：{progress['actors_updated']} 个演员")
+
+
+@app.cli.command('export-content')
+@click.option('--format', 'fmt', type=click.Choice(list(EXPORT_FORMATS)), default='ndjson')
+@click.option('--type', 'kinds', default='movie,actor,post', help='逗号分隔，CSV 只能一种')
+@click.option('--output', '-o', type=click.File('wb'), required=True, help='输出文件')
+@click.option('--no-covers', is_flag=True, help='tar/zip 不包含封面图片')
+def export_content_command(fmt, kinds, output, no_covers):
+    """
+    流式导出影片、演员和博客文章。
+    用法：flask --app app export-content --format tar -o backup.tar.gz
+    """
+    try:
+        stream = export_stream(fmt, parse_export_kinds(kinds), not no_covers)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+    for chunk in stream:
+        output.write(chunk)
+
+
 if __name__ == '__main__':
-    app.run(debug=True, port=5000, host="0.0.0.0")
+    # 开发服务器；生产环境使用 gunicorn -c gunicorn.conf.py app:app
+    app.run(debug=FLASK_DEBUG, port=5000, host="0.0.0.0")
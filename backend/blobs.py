@@ -0,0 +1,143 @@
+import hashlib
+import os
+import shutil
+import uuid
+from locks import FileLock
+from uploads import save_stream, sniff_image
+
+# 图片类型 -> 内容寻址文件的扩展名
+BLOB_EXTENSIONS = {'png': '.png', 'jpeg': '.jpg', 'gif': '.gif', 'webp': '.webp'}
+
+
+class BlobStore:
+    """
+    按内容 sha256 寻址的图片存储：folder/ab/<sha256>.<ext>。
+
+    封面和图床中的文件名是指向 blob 的硬链接（名称 -> 哈希的引用），
+    相同内容无论以什么名字、上传到哪个文件夹都只占一份磁盘；blob 的链接数减一即引用数，
+    引用数为零的 blob 由 gc() 清理。文件系统不支持硬链接时退回到复制，功能不变但不去重。
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.incoming_folder = os.path.join(folder, 'incoming')
+        # store() 与 gc() 之间互斥，避免刚被复用的 blob 被当作无引用删除
+        self._lock = FileLock(os.path.join(folder, '.lock'))
+
+    def store(self, read, dest_path, max_bytes, filename=None):
+        """
+        分块读取图片存入 blob（内容已存在时直接复用），再原子地把 dest_path 指向它。
+        图片类型必须与 filename（默认为 dest_path）的扩展名一致。
+        返回 {"type", "size", "sha256", "blob"}，blob 为内容寻址的文件名（ab/<sha256>.<ext>）。
+        """
+        incoming_path = os.path.join(self.incoming_folder, uuid.uuid4().hex)
+        info = save_stream(read, incoming_path, max_bytes, filename or dest_path)
+        try:
+            with self._lock:
+                blob = self._blob_name(info['sha256'], info['type'])
+                blob_path = os.path.join(self.folder, blob)
+                if os.path.exists(blob_path):
+                    os.remove(incoming_path)
+                else:
+                    os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                    os.replace(incoming_path, blob_path)
+                self._link(blob_path, dest_path)
+        finally:
+            if os.path.exists(incoming_path):
+                os.remove(incoming_path)
+        info['blob'] = blob
+        return info
+
+    def adopt(self, path):
+        """
+        把已有的图片文件纳入 blob 存储（内容相同的文件合并为同一份），返回 blob 名，不是图片时返回 None。
+        """
+        with open(path, 'rb') as f:
+            image_type = sniff_image(f.read(16))
+        if image_type is None:
+            return None
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        blob = self._blob_name(digest.hexdigest(), image_type)
+        blob_path = os.path.join(self.folder, blob)
+        with self._lock:
+            if not os.path.exists(blob_path):
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                try:
+                    os.link(path, blob_path)
+                    return blob
+                except OSError:
+                    shutil.copyfile(path, blob_path)
+            if not os.path.samefile(path, blob_path):
+                self._link(blob_path, path)
+        return blob
+
+    def path(self, blob):
+        """
+        blob 名对应的文件路径，名称不合法时返回 None。
+        """
+        folder, _, name = blob.partition('/')
+        sha256, ext = os.path.splitext(name)
+        if (len(sha256) != 64 or folder != sha256[:2] or ext not in BLOB_EXTENSIONS.values()
+                or any(c not in '0123456789abcdef' for c in sha256)):
+            return None
+        return os.path.join(self.folder, blob)
+
+    def gc(self):
+        """
+        删除没有任何文件名引用的 blob（链接数为 1），返回删除的数量。
+        复制模式下无法统计引用，不做清理。
+        """
+        removed = 0
+        if not os.path.isdir(self.folder) or not self._supports_links():
+            return removed
+        with self._lock:
+            for prefix in os.listdir(self.folder):
+                prefix_folder = os.path.join(self.folder, prefix)
+                if len(prefix) != 2 or not os.path.isdir(prefix_folder):
+                    continue
+                for name in os.listdir(prefix_folder):
+                    blob_path = os.path.join(prefix_folder, name)
+                    try:
+                        if os.stat(blob_path).st_nlink == 1:
+                            os.remove(blob_path)
+                            removed += 1
+                    except FileNotFoundError:
+                        pass
+        return removed
+
+    @staticmethod
+    def _blob_name(sha256, image_type):
+        return f"{sha256[:2]}/{sha256}{BLOB_EXTENSIONS[image_type]}"
+
+    @staticmethod
+    def _link(blob_path, dest_path):
+        # 先在目标文件夹中建立临时链接，再原子替换，读取方不会看到缺失或不完整的文件
+        folder = os.path.dirname(dest_path)
+        os.makedirs(folder, exist_ok=True)
+        tmp_path = os.path.join(folder, f".{os.path.basename(dest_path)}.{uuid.uuid4().hex[:8]}.tmp")
+        try:
+            try:
+                os.link(blob_path, tmp_path)
+            except OSError:
+                shutil.copyfile(blob_path, tmp_path)
+            os.replace(tmp_path, dest_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _supports_links(self):
+        # 复制模式（文件系统不支持硬链接）下链接数无法说明引用情况
+        os.makedirs(self.incoming_folder, exist_ok=True)
+        probe = os.path.join(self.incoming_folder, f"probe-{uuid.uuid4().hex[:8]}")
+        open(probe, 'wb').close()
+        try:
+            os.link(probe, probe + '.link')
+        except OSError:
+            return False
+        finally:
+            os.remove(probe)
+        os.remove(probe + '.link')
+        return True
@@ -0,0 +1,356 @@
+import hashlib
+import os
+import threading
+import time
+import frontmatter
+
+
+class Collection:
+    """
+    单个内容文件夹（movies / actors / posts）的内存缓存。
+
+    每个 Markdown 文件只在首次出现或 mtime/size 变化时解析一次，
+    解析结果（frontmatter.Post 与由 build_record 生成的记录）常驻内存。
+    """
+
+    def __init__(self, folder, build_record, overlay=None, store=None):
+        self.folder = folder
+        self.name = os.path.basename(os.path.normpath(folder))
+        self.build_record = build_record
+        self.overlay = overlay  # overlay(filename) 返回尚未写入文件、需要叠加的字段
+        self.store = store  # 可选的持久化索引（IndexStore），重启后免于重新解析
+        self._stored = None  # 首次扫描时从持久化索引载入、尚未使用的条目
+        # 有文件监听时设为秒数：读取时最多每隔这么久做一次兜底全量扫描；None 表示每次读取都扫描
+        self.rescan_interval = None
+        self._scanned_at = 0
+        self.generation = 0  # 任意文件变化时递增，用于派生数据的缓存失效
+        # 内容指纹：各文件 (文件名, mtime, size, front matter) 摘要的异或，只取决于内容本身，
+        # 多个工作进程、进程重启后对同样的内容得到同样的值，用作 ETag
+        self.fingerprint = 0
+        self._entries = {}  # filename -> (mtime_ns, size, post, record)
+        self._digests = {}  # filename -> 摘要
+        self._listeners = []
+        self._sorted_cache = {}
+        self._lock = threading.RLock()
+
+    def add_listener(self, listener):
+        """
+        注册变更回调 listener(filename, old_record, new_record)，
+        新增时 old_record 为 None，删除时 new_record 为 None。
+        """
+        self._listeners.append(listener)
+
+    def refresh(self):
+        """
+        扫描文件夹，仅重新解析 mtime/size 发生变化的文件。
+        有文件监听保持缓存最新时，只按 rescan_interval 做兜底扫描。
+        """
+        with self._lock:
+            if self.rescan_interval is not None and time.time() - self._scanned_at < self.rescan_interval:
+                return
+            self._scanned_at = time.time()
+            seen = set()
+            if os.path.exists(self.folder):
+                for filename in os.listdir(self.folder):
+                    if not filename.endswith('.md'):
+                        continue
+                    seen.add(filename)
+                    self._check(filename)
+            for filename in list(self._entries):
+                if filename not in seen:
+                    self._drop(filename)
+            if self.store:
+                # 索引中残留的、文件已被删除的条目
+                for filename in self._stored or ():
+                    self.store.delete(self.name, filename)
+                self._stored = {}
+                self.store.commit()
+
+    def touch(self, *filenames):
+        """
+        写接口修改文件后调用，强制重新加载这些文件（文件不存在则移除），持久化索引只提交一次。
+        """
+        with self._lock:
+            for filename in filenames:
+                self._check(filename, force=True)
+            if self.store:
+                self.store.commit()
+
+    def put(self, posts):
+        """
+        写入方已持有解析结果时（例如批量导入）直接更新缓存 {文件名: frontmatter.Post}，
+        免于重新读取和解析刚写入的文件。持久化索引只提交一次。
+        """
+        with self._lock:
+            for filename, post in posts.items():
+                self._check(filename, post=post)
+            if self.store:
+                self.store.commit()
+
+    def notify(self, filename):
+        """
+        文件监听回调：文件被新增、修改、删除或重命名时调用，只在 mtime/size 变化时重新解析。
+        """
+        if not filename.endswith('.md'):
+            return
+        with self._lock:
+            self._check(filename)
+            if self.store:
+                self.store.commit()
+
+    def patch(self, filename, fields):
+        """
+        直接修改缓存中的 front matter 字段而不读写文件，用于已记入日志、尚未落盘的变更。
+        """
+        with self._lock:
+            self._check(filename)
+            entry = self._entries.get(filename)
+            if entry is None:
+                return
+            post = frontmatter.Post(entry[2].content)
+            post.metadata = dict(entry[2].metadata, **fields)
+            record = self.build_record(filename, post)
+            self._entries[filename] = (entry[0], entry[1], post, record)
+            self._set_digest(filename, entry[0], entry[1], post)
+            self._changed(filename, entry[3], record)
+
+    def get(self, filename):
+        """
+        获取单个文件的记录，只检查该文件本身的 mtime/size。
+        """
+        entry = self.get_entry(filename)
+        return entry[3] if entry else None
+
+    def get_post(self, filename):
+        """
+        获取单个文件缓存的 frontmatter.Post。
+        """
+        entry = self.get_entry(filename)
+        return entry[2] if entry else None
+
+    def cached_post(self, filename):
+        """
+        直接返回缓存中的 frontmatter.Post，不检查文件（供变更回调内部使用）。
+        """
+        entry = self._entries.get(filename)
+        return entry[2] if entry else None
+
+    def cached(self, filename):
+        """
+        直接返回缓存中的记录，不检查文件。调用方负责先刷新（例如批量读取索引命中的记录）。
+        """
+        entry = self._entries.get(filename)
+        return entry[3] if entry else None
+
+    def get_entry(self, filename):
+        with self._lock:
+            self._check(filename)
+            return self._entries.get(filename)
+
+    def records(self, sort_key=None, reverse=False, limit=None):
+        """
+        返回全部记录（给出 limit 时只返回排序后的前 limit 条）。记录为共享对象，调用方不应修改。
+        """
+        self.refresh()
+        with self._lock:
+            if sort_key is None:
+                return [entry[3] for entry in self._entries.values()][:limit]
+            return list(self._sorted(sort_key, reverse)[0][:limit])
+
+    def count(self):
+        """
+        返回文件数。
+        """
+        self.refresh()
+        return len(self._entries)
+
+    def posts(self):
+        """
+        返回 [(文件名, frontmatter.Post)]，按文件名排序，用于需要完整 front matter 的导出。
+        """
+        self.refresh()
+        with self._lock:
+            return [(filename, self._entries[filename][2]) for filename in sorted(self._entries)]
+
+    def neighbours(self, filename, sort_key, reverse=False):
+        """
+        返回该文件在排序结果中的前一条和后一条记录（不存在时为 None）。
+        """
+        self.refresh()
+        with self._lock:
+            items, positions = self._sorted(sort_key, reverse)
+            index = positions.get(filename)
+            if index is None:
+                return None, None
+            prev_record = items[index - 1] if index > 0 else None
+            next_record = items[index + 1] if index + 1 < len(items) else None
+            return prev_record, next_record
+
+    def replay(self, listener):
+        """
+        对当前每条记录调用一次 listener(filename, None, record)，用于后台补建派生索引。
+        每条记录单独加锁读取，与变更回调互斥：补建期间被修改或删除的文件不会被旧数据覆盖。
+        """
+        self.refresh()
+        for filename in list(self._entries):
+            with self._lock:
+                entry = self._entries.get(filename)
+                if entry is not None:
+                    listener(filename, None, entry[3])
+
+    def _sorted(self, sort_key, reverse):
+        # 排序结果按 generation 缓存，内容不变时重复读取无需重新排序
+        cache_key = (sort_key, reverse)
+        cached = self._sorted_cache.get(cache_key)
+        if cached is None or cached[0] != self.generation:
+            pairs = sorted(self._entries.items(), key=lambda item: sort_key(item[1][3]), reverse=reverse)
+            items = [entry[3] for _, entry in pairs]
+            positions = {filename: index for index, (filename, _) in enumerate(pairs)}
+            cached = (self.generation, items, positions)
+            self._sorted_cache[cache_key] = cached
+        return cached[1], cached[2]
+
+    def _check(self, filename, force=False, post=None):
+        file_path = os.path.join(self.folder, filename)
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            self._drop(filename)
+            return
+        entry = self._entries.get(filename)
+        if not force and post is None and entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+            return
+        if post is None:
+            post = self._load(filename, file_path, stat, force)
+        elif self.store:
+            self.store.save(self.name, filename, stat.st_mtime_ns, stat.st_size, dict(post.metadata), post.content)
+        if self.overlay:
+            post.metadata.update(self.overlay(filename))
+        record = self.build_record(filename, post)
+        self._entries[filename] = (stat.st_mtime_ns, stat.st_size, post, record)
+        self._set_digest(filename, stat.st_mtime_ns, stat.st_size, post)
+        self._changed(filename, entry[3] if entry else None, record)
+
+    def _load(self, filename, file_path, stat, force):
+        if self.store and self._stored is None:
+            self._stored = self.store.load(self.name)
+        stored = self._stored.pop(filename, None) if self._stored else None
+        if not force and stored and stored[0] == stat.st_mtime_ns and stored[1] == stat.st_size:
+            post = frontmatter.Post(stored[3])
+            post.metadata = stored[2]
+            return post
+
+        with open(file_path, 'r', encoding='utf-8') as f:
+            post = frontmatter.load(f)
+        if self.store:
+            self.store.save(self.name, filename, stat.st_mtime_ns, stat.st_size, dict(post.metadata), post.content)
+        return post
+
+    def _drop(self, filename):
+        entry = self._entries.pop(filename, None)
+        if entry:
+            self.fingerprint ^= self._digests.pop(filename, 0)
+            if self.store:
+                self.store.delete(self.name, filename)
+            self._changed(filename, entry[3], None)
+
+    def _set_digest(self, filename, mtime_ns, size, post):
+        # front matter 计入摘要：叠加了未落盘字段的记录与文件内容不同
+        data = repr((filename, mtime_ns, size, sorted(post.metadata.items()))).encode('utf-8')
+        digest = int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'big')
+        self.fingerprint ^= self._digests.get(filename, 0) ^ digest
+        self._digests[filename] = digest
+
+    def _changed(self, filename, old_record, new_record):
+        self.generation += 1
+        for listener in self._listeners:
+            listener(filename, old_record, new_record)
+
+
+class FieldIndex:
+    """
+    Collection 上的倒排索引：字段值 -> 文件名集合。
+
+    key(record) 返回该记录的所有索引值（可多值，例如标签列表），
+    索引随 Collection 的变更回调增量维护，查询无需扫描文件。
+    """
+
+    def __init__(self, collection, key):
+        self.collection = collection
+        self.key = key
+        self._index = {}
+        collection.add_listener(self._on_change)
+
+    def _on_change(self, filename, old_record, new_record):
+        if old_record is not None:
+            for value in self.key(old_record):
+                filenames = self._index.get(value)
+                if filenames is not None:
+                    filenames.discard(filename)
+                    if not filenames:
+                        del self._index[value]
+        if new_record is not None:
+            for value in self.key(new_record):
+                self._index.setdefault(value, set()).add(filename)
+
+    def lookup(self, value, refresh=True):
+        """
+        返回字段值对应的文件名列表（按文件名排序，结果稳定）。
+        批量查询时可先刷新一次 Collection，再以 refresh=False 逐个查找。
+        """
+        if refresh:
+            self.collection.refresh()
+        return sorted(self._index.get(value, ()))
+
+    def members(self, value):
+        """
+        返回字段值对应的文件名集合（副本，可直接做集合运算）。调用方负责先刷新 Collection。
+        """
+        return set(self._index.get(value, ()))
+
+    def counts(self):
+        """
+        返回 {字段值: 文件数}。
+        """
+        self.collection.refresh()
+        return {value: len(filenames) for value, filenames in self._index.items()}
+
+    def first(self, value, refresh=True):
+        """
+        返回字段值对应的第一个文件名，不存在时返回 None。
+        """
+        filenames = self.lookup(value, refresh)
+        return filenames[0] if filenames else None
+
+
+class BackgroundBuild:
+    """
+    在后台线程中构建计算量大的派生索引（全文检索、拼音），不占用启动时的 refresh()。
+
+    build() 开始前变更回调不做任何事；开始后先让回调即时生效，再用 Collection.replay 补齐已有记录，
+    两者都在 Collection 的锁内执行，构建期间的修改不会丢失。构建完成后 ready 被置位。
+    """
+
+    def __init__(self):
+        self._bindings = []  # [(collection, listener)]
+        self._live = False
+        self.ready = threading.Event()
+
+    def bind(self, collection, listener):
+        self._bindings.append((collection, listener))
+
+        def on_change(filename, old_record, new_record):
+            if self._live:
+                listener(filename, old_record, new_record)
+        collection.add_listener(on_change)
+
+    def start(self):
+        threading.Thread(target=self.build, daemon=True).start()
+
+    def build(self):
+        started = time.time()
+        self._live = True
+        for collection, listener in self._bindings:
+            collection.replay(listener)
+        self.ready.set()
+        print(f"检索索引构建完成：{time.time() - started:.1f}s")
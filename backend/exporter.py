@@ -0,0 +1,153 @@
+import csv
+import io
+import json
+import os
+import tarfile
+import tempfile
+import zipfile
+from datetime import date, datetime
+
+# 支持的导出格式：扩展名和 MIME 类型
+EXPORT_FORMATS = {
+    'ndjson': ('ndjson', 'application/x-ndjson'),
+    'csv': ('csv', 'text/csv; charset=utf-8'),
+    'xlsx': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'tar': ('tar.gz', 'application/gzip'),
+    'zip': ('zip', 'application/zip'),
+}
+
+# CSV/XLSX 的列，与批量导入的列一致，导出的文件可以直接再导入
+EXPORT_COLUMNS = {
+    'movie': ['title', 'actors', 'tags', 'description', 'rating', 'order', 'cover', 'body'],
+    'actor': ['name', 'birth', 'debut', 'favorite', 'cover', 'x', 'instagram', 'wiki', 'body'],
+    'post': ['slug', 'title', 'date', 'author', 'tags', 'excerpt', 'body'],
+}
+
+# 已压缩的图片在 zip 中直接存储，不再压缩
+_STORED_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.webp'}
+
+CHUNK_SIZE = 64 * 1024
+
+
+def export_row(kind, filename, post):
+    """
+    一个 Markdown 文件的导出数据：front matter 全部字段加上正文。
+    """
+    row = {"type": kind}
+    if kind == 'post':
+        row["slug"] = os.path.splitext(filename)[0]
+    row.update(post.metadata)
+    row["body"] = post.content
+    return row
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _cell(value):
+    if value is None:
+        return ''
+    if isinstance(value, (list, tuple)):
+        return ', '.join(str(item) for item in value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def ndjson_stream(rows):
+    """
+    每条数据一行 JSON，逐行产出。
+    """
+    for row in rows:
+        yield (json.dumps(row, ensure_ascii=False, default=_json_default) + '\n').encode('utf-8')
+
+
+def csv_stream(rows, columns):
+    """
+    CSV（带 BOM，Excel 可直接打开），每行单独编码后产出。
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield ('\ufeff' + buffer.getvalue()).encode('utf-8')
+    for row in rows:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow([_cell(row.get(column)) for column in columns])
+        yield buffer.getvalue().encode('utf-8')
+
+
+def xlsx_stream(sheets):
+    """
+    sheets 为 [(工作表名, 列, 行)]。openpyxl 的只写模式逐行写入磁盘临时文件，
+    保存完成后分块产出，内存占用与数据量无关。
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    for title, columns, rows in sheets:
+        sheet = workbook.create_sheet(title)
+        sheet.append(columns)
+        for row in rows:
+            sheet.append([_cell(row.get(column)) for column in columns])
+    with tempfile.TemporaryFile() as f:
+        workbook.save(f)
+        f.seek(0)
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+class _StreamBuffer:
+    """
+    tarfile/zipfile 的写入目标：暂存写入的数据，由生成器在每个文件写完后取走。
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def archive_stream(files, fmt):
+    """
+    把 [(磁盘路径, 归档内路径)] 打包为 tar.gz 或 zip 流，每写完一个文件产出一次，
+    缓冲的数据不超过单个文件的大小。读取时已被删除的文件跳过。
+    """
+    buffer = _StreamBuffer()
+    if fmt == 'tar':
+        archive = tarfile.open(fileobj=buffer, mode='w|gz')
+        add = lambda path, arcname: archive.add(path, arcname, recursive=False)
+    else:
+        archive = zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED)
+        add = lambda path, arcname: archive.write(
+            path, arcname,
+            zipfile.ZIP_STORED if os.path.splitext(path)[1].lower() in _STORED_EXTENSIONS else zipfile.ZIP_DEFLATED,
+        )
+    with archive:
+        for path, arcname in files:
+            try:
+                add(path, arcname)
+            except FileNotFoundError:
+                continue
+            data = buffer.drain()
+            if data:
+                yield data
+    yield buffer.drain()
@@ -0,0 +1,32 @@
+# gunicorn 生产环境配置：gunicorn -c gunicorn.conf.py app:app
+# 平滑重载：向主进程发送 HUP 信号（kill -HUP <pid>），旧工作进程处理完当前请求后退出
+import os
+
+bind = os.environ.get('BIND', '0.0.0.0:5000')
+
+# 工作进程数与每个进程的线程数（命令行 -w 优先）。多进程时元数据日志改为直接写文件，见 app.py 中的 WEB_WORKERS
+workers = int(os.environ.get('WEB_WORKERS', '1'))
+threads = int(os.environ.get('WEB_THREADS', '8'))
+worker_class = 'gthread'
+
+# 请求超时与平滑退出等待时间（秒）
+timeout = int(os.environ.get('WEB_TIMEOUT', '60'))
+graceful_timeout = int(os.environ.get('WEB_GRACEFUL_TIMEOUT', '30'))
+keepalive = 5
+
+# 不预加载应用：元数据日志写回线程和文件监听需要在每个工作进程内各自启动
+preload_app = False
+
+accesslog = '-'
+errorlog = '-'
+
+
+def post_fork(server, worker):
+    # 应用在工作进程中加载（preload_app = False），以实际生效的工作进程数为准，而不是环境变量的默认值
+    os.environ['WEB_WORKERS'] = str(server.cfg.workers)
+
+
+def worker_exit(server, worker):
+    # 工作进程退出（包括平滑重载）前把未落盘的元数据日志写回文件
+    import app
+    app.metadata_journal.flush()
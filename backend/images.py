@@ -0,0 +1,74 @@
+import hashlib
+import os
+import threading
+import time
+from werkzeug.security import safe_join
+
+
+class ImageResolver:
+    """
+    /imgs 路径解析缓存：请求路径 -> (图片所在的根目录, 相对路径)，未找到的路径也会缓存（值为 None）。
+    所有根目录都没有时再调用 fallback(filename)，用于分片存放的图床图片等路径与 URL 不一致的情况。
+
+    ttl 为 None 时缓存一直有效，由文件监听和上传接口调用 invalidate() 失效；
+    未开启监听时缓存 ttl 秒后过期，重新检查文件是否存在。
+    同时缓存每个文件的内容哈希（按 mtime/size 校验），用作 ETag。
+    """
+
+    def __init__(self, roots, ttl=5.0, fallback=None):
+        self.roots = roots
+        self.ttl = ttl
+        self.fallback = fallback
+        self._paths = {}  # filename -> ((root, relpath) 或 None, 过期时间)
+        self._hashes = {}  # 文件路径 -> (mtime_ns, size, sha1)
+        self._lock = threading.Lock()
+
+    def resolve(self, filename):
+        """
+        返回 (根目录, 相对路径)，不存在时返回 None。
+        """
+        now = time.monotonic()
+        with self._lock:
+            cached = self._paths.get(filename)
+        if cached is not None and (cached[1] is None or cached[1] > now):
+            return cached[0]
+
+        found = None
+        for root in self.roots:
+            path = safe_join(root, filename)
+            if path is not None and os.path.isfile(path):
+                found = (root, filename)
+                break
+        if found is None and self.fallback is not None:
+            found = self.fallback(filename)
+        with self._lock:
+            self._paths[filename] = (found, None if self.ttl is None else now + self.ttl)
+        return found
+
+    def invalidate(self, filename=None):
+        """
+        清除某个路径（或全部路径）的解析结果。
+        """
+        with self._lock:
+            if filename is None:
+                self._paths.clear()
+            else:
+                self._paths.pop(filename, None)
+
+    def content_hash(self, path):
+        """
+        返回文件内容的 sha1，文件未变化时直接使用缓存。
+        """
+        stat = os.stat(path)
+        with self._lock:
+            cached = self._hashes.get(path)
+        if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+
+        digest = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        with self._lock:
+            self._hashes[path] = (stat.st_mtime_ns, stat.st_size, digest.hexdigest())
+        return digest.hexdigest()
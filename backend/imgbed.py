@@ -0,0 +1,139 @@
+import bisect
+import hashlib
+import os
+import threading
+import time
+
+
+class ImgbedIndex:
+    """
+    图床图片索引：文件名 -> (mtime, size, 相对路径)，并按修改时间倒序维护有序键数组，
+    列表接口直接分页，不再每次遍历目录和 stat 每个文件。上传和文件监听时增量更新。
+
+    sharded 为 True 时新图片存放在按文件名哈希分的子文件夹 imgbed/ab/<文件名> 中，
+    避免单个目录文件过多；URL 始终是 /imgs/imgbed/<文件名>，旧的平铺文件继续可用。
+    """
+
+    def __init__(self, folder, extensions, sharded=False):
+        self.folder = folder
+        self.extensions = extensions
+        self.sharded = sharded
+        self.generation = 0
+        self.fingerprint = 0  # 各图片 (文件名, mtime, size) 摘要的异或，与进程无关，用作 ETag
+        self.rescan_interval = None  # None 表示每次读取都重新扫描；开启文件监听后改为兜底间隔
+        self._entries = {}  # filename -> (mtime, size, relpath)
+        self._order = []  # 按 (-mtime, filename) 排序
+        self._scanned_at = None
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def shard(filename):
+        return hashlib.sha1(filename.encode('utf-8')).hexdigest()[:2]
+
+    def relpath(self, filename):
+        """
+        图片相对于图床文件夹的路径，不存在时返回 None。
+        """
+        self.refresh()
+        entry = self._entries.get(filename)
+        return entry[2] if entry else None
+
+    def path_for(self, filename):
+        """
+        保存 filename 时使用的绝对路径：已存在的图片原地覆盖，新图片按 sharded 决定位置。
+        """
+        relpath = self.relpath(filename)
+        if relpath is None:
+            relpath = os.path.join(self.shard(filename), filename) if self.sharded else filename
+        return os.path.join(self.folder, relpath)
+
+    def refresh(self, force=False):
+        """
+        全量扫描图床文件夹（平铺文件和一级分片子文件夹）。
+        """
+        with self._lock:
+            now = time.monotonic()
+            if (not force and self._scanned_at is not None and self.rescan_interval is not None
+                    and now - self._scanned_at < self.rescan_interval):
+                return
+            self._scanned_at = now
+            found = {}
+            if os.path.isdir(self.folder):
+                for entry in os.scandir(self.folder):
+                    if entry.is_dir() and len(entry.name) == 2 and not entry.name.startswith('.'):
+                        for child in os.scandir(entry.path):
+                            self._collect(found, child, os.path.join(entry.name, child.name))
+                    else:
+                        self._collect(found, entry, entry.name)
+            if found != self._entries:
+                self._entries = found
+                self._order = sorted((-mtime, filename) for filename, (mtime, _, _) in found.items())
+                self.fingerprint = 0
+                for filename, entry in found.items():
+                    self.fingerprint ^= self._digest(filename, entry)
+                self._changed()
+
+    def notify(self, filename):
+        """
+        文件监听回调：重新检查该文件名可能所在的两个位置。
+        """
+        if filename.startswith('.') or os.path.splitext(filename)[1].lower() not in self.extensions:
+            return
+        with self._lock:
+            current = None
+            for relpath in (filename, os.path.join(self.shard(filename), filename)):
+                try:
+                    stat = os.stat(os.path.join(self.folder, relpath))
+                except FileNotFoundError:
+                    continue
+                current = (stat.st_mtime, stat.st_size, relpath)
+                break
+            previous = self._entries.get(filename)
+            if current == previous:
+                return
+            if previous is not None:
+                del self._order[bisect.bisect_left(self._order, (-previous[0], filename))]
+                del self._entries[filename]
+                self.fingerprint ^= self._digest(filename, previous)
+            if current is not None:
+                self._entries[filename] = current
+                bisect.insort(self._order, (-current[0], filename))
+                self.fingerprint ^= self._digest(filename, current)
+            self._changed()
+
+    def page(self, after=None, offset=0, limit=None, query=None):
+        """
+        按修改时间倒序返回 (条目列表, 总数)。after 为上一页最后一条的排序键 (-mtime, filename)，
+        query 为文件名包含的关键词（不区分大小写）。条目为 (排序键, filename, mtime, size)。
+        """
+        self.refresh()
+        with self._lock:
+            order = self._order
+            if query:
+                query = query.lower()
+                order = [key for key in order if query in key[1].lower()]
+            start = bisect.bisect_right(order, tuple(after)) if after is not None else offset
+            keys = order[start:start + limit] if limit is not None else order[start:]
+            items = [(key, key[1], -key[0], self._entries[key[1]][1]) for key in keys]
+            return items, len(order)
+
+    def _collect(self, found, entry, relpath):
+        if entry.name.startswith('.') or os.path.splitext(entry.name)[1].lower() not in self.extensions:
+            return
+        try:
+            if not entry.is_file():
+                return
+            stat = entry.stat()
+        except FileNotFoundError:
+            return
+        # 同名文件同时存在于平铺位置和分片位置时以平铺位置为准，与 notify() 一致
+        if entry.name not in found or os.sep not in relpath:
+            found[entry.name] = (stat.st_mtime, stat.st_size, relpath)
+
+    @staticmethod
+    def _digest(filename, entry):
+        data = repr((filename, entry[0], entry[1])).encode('utf-8')
+        return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'big')
+
+    def _changed(self):
+        self.generation += 1
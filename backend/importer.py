@@ -0,0 +1,178 @@
+import csv
+import io
+import json
+import os
+from datetime import date, datetime
+
+# 支持的导入格式
+IMPORT_FORMATS = ('csv', 'xlsx', 'jsonl')
+
+# 每一行导入的类型：影片或演员（type 列可覆盖默认类型）
+ROW_KINDS = {'movie': 'movie', 'movies': 'movie', '影片': 'movie', 'actor': 'actor', 'actors': 'actor', '演员': 'actor'}
+
+
+class ImportRowError(ValueError):
+    """
+    单行数据校验失败，导入会跳过该行并记录原因。
+    """
+
+
+def detect_format(filename, fmt=None):
+    """
+    由 format 参数或文件扩展名确定导入格式，无法识别时抛出 ValueError。
+    """
+    fmt = (fmt or os.path.splitext(filename or '')[1].lstrip('.')).lower()
+    fmt = {'json': 'jsonl', 'ndjson': 'jsonl'}.get(fmt, fmt)
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"不支持的导入格式: {fmt or filename}")
+    return fmt
+
+
+def read_rows(stream, fmt):
+    """
+    逐行读取二进制流，产出 (行号, 行数据)，不把整个文件读入内存。
+    CSV/XLSX 的第一行为表头；JSON Lines 每行一个对象，无法解析的行产出 None。
+    """
+    if fmt == 'xlsx':
+        yield from _read_xlsx(stream)
+        return
+
+    lines = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        for row_number, row in enumerate(csv.DictReader(lines), start=2):
+            row = {(key or '').strip(): value for key, value in row.items() if key}
+            if any(str(value or '').strip() for value in row.values()):
+                yield row_number, row
+        return
+
+    for row_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield row_number, json.loads(line)
+        except ValueError:
+            yield row_number, None
+
+
+def _read_xlsx(stream):
+    from openpyxl import load_workbook
+
+    # 只读模式按行流式读取，内存占用与表格大小无关
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(cell).strip() if cell is not None else '' for cell in next(rows, ())]
+        for row_number, values in enumerate(rows, start=2):
+            if all(value is None or str(value).strip() == '' for value in values):
+                continue
+            yield row_number, {key: value for key, value in zip(header, values) if key}
+    finally:
+        workbook.close()
+
+
+def text(row, key, default=''):
+    """
+    取单元格文本：去除首尾空白，Excel 中的整数值和日期转换为常见写法。
+    """
+    value = row.get(key)
+    if value is None:
+        return default
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    elif isinstance(value, (datetime, date)):
+        value = value.strftime('%Y-%m-%d')
+    value = str(value).strip()
+    return value if value else default
+
+
+def split_list(value):
+    """
+    列表字段：JSON 中的数组，或以中英文逗号分隔的文本。
+    """
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        items = value
+    else:
+        items = str(value).replace('，', ',').split(',')
+    return [str(item).strip() for item in items if str(item).strip()]
+
+
+def integer(row, key, default, low, high, label):
+    value = text(row, key)
+    if not value:
+        return default
+    try:
+        number = float(value)
+    except ValueError:
+        raise ImportRowError(f"{label}必须是数字: {value}")
+    if not number.is_integer() or not low <= number <= high:
+        raise ImportRowError(f"{label}必须是 {low}-{high} 之间的整数: {value}")
+    return int(number)
+
+
+def row_kind(row, default):
+    if not isinstance(row, dict):
+        raise ImportRowError("不是有效的 JSON 对象")
+    kind = text(row, 'type', default).lower()
+    if kind not in ROW_KINDS:
+        raise ImportRowError(f"未知的类型: {kind}")
+    return ROW_KINDS[kind]
+
+
+def content_filename(name, label):
+    """
+    与创建接口一致的文件名：空格替换为下划线。
+    """
+    if not name:
+        raise ImportRowError(f"缺少{label}")
+    if '/' in name or '\\' in name or name.startswith('.'):
+        raise ImportRowError(f"{label}不能包含路径字符: {name}")
+    return f"{name.replace(' ', '_')}.md"
+
+
+def movie_fields(row):
+    """
+    校验影片行，返回 (文件名, front matter, 正文)。未给出 order 时为 None，由调用方分配。
+    """
+    title = text(row, 'title')
+    filename = content_filename(title, '标题')
+    order = text(row, 'order')
+    if order:
+        try:
+            number = float(order)
+        except ValueError:
+            raise ImportRowError(f"排序必须是数字: {order}")
+        # 排行使用整数 order（稀疏模式在相邻整数之间插入），小数会破坏这一约定
+        if not number.is_integer():
+            raise ImportRowError(f"排序必须是整数: {order}")
+        order = int(number)
+    metadata = {
+        "title": title,
+        "actors": ', '.join(split_list(row.get('actors'))),
+        "tags": split_list(row.get('tags')),
+        "description": text(row, 'description'),
+        "order": order if order != '' else None,
+        "rating": integer(row, 'rating', 0, 0, 5, '评分'),
+        "cover": text(row, 'cover', f"{title.replace(' ', '_')}.jpg"),
+    }
+    return filename, metadata, text(row, 'body')
+
+
+def actor_fields(row):
+    """
+    校验演员行，返回 (文件名, front matter, 正文)。
+    """
+    name = text(row, 'name')
+    filename = content_filename(name, '姓名')
+    metadata = {
+        "name": name,
+        "birth": text(row, 'birth'),
+        "debut": text(row, 'debut'),
+        "favorite": integer(row, 'favorite', 1, 1, 5, '喜爱度'),
+        "cover": text(row, 'cover', f"{name.replace(' ', '_')}.jpg"),
+        "x": text(row, 'x'),
+        "instagram": text(row, 'instagram'),
+        "wiki": text(row, 'wiki'),
+    }
+    return filename, metadata, text(row, 'body')
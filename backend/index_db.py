@@ -0,0 +1,99 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from datetime import date, datetime
+
+# 表结构版本：2 起 front matter 以 JSON 保存（此前为 pickle），旧版本的表直接丢弃重建
+SCHEMA_VERSION = 2
+
+
+def _encode(value):
+    # YAML 中的日期/时间（例如文章的 date）带上类型标记，载入后还原为原类型
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, date):
+        return {"__date__": value.isoformat()}
+    raise TypeError(f"无法序列化的字段类型: {type(value).__name__}")
+
+
+def _decode(obj):
+    if len(obj) == 1:
+        if "__datetime__" in obj:
+            return datetime.fromisoformat(obj["__datetime__"])
+        if "__date__" in obj:
+            return date.fromisoformat(obj["__date__"])
+    return obj
+
+
+class IndexStore:
+    """
+    持久化在 SQLite 中的元数据索引。
+
+    保存每个 Markdown 文件解析后的 front matter、正文及其哈希和文件 mtime/size，
+    进程重启时 mtime/size 未变化的文件直接从索引载入，无需重新解析 YAML。
+    多个工作进程可以共享同一个索引文件（WAL 模式，写入冲突时等待锁释放）。
+    Markdown 文件始终是唯一的数据来源，索引可以随时删除重建。
+    front matter 以 JSON 保存，载入索引不会执行任何代码。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        with self._conn:
+            if self._conn.execute('PRAGMA user_version').fetchone()[0] < SCHEMA_VERSION:
+                self._conn.execute('DROP TABLE IF EXISTS entries')
+                self._conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+            self._conn.execute(
+                'CREATE TABLE IF NOT EXISTS entries ('
+                ' collection TEXT NOT NULL,'
+                ' filename TEXT NOT NULL,'
+                ' mtime_ns INTEGER NOT NULL,'
+                ' size INTEGER NOT NULL,'
+                ' body_hash TEXT NOT NULL,'
+                ' metadata TEXT NOT NULL,'
+                ' content TEXT NOT NULL,'
+                ' PRIMARY KEY (collection, filename))'
+            )
+
+    def load(self, collection):
+        """
+        返回 {filename: (mtime_ns, size, metadata, content)}。
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT filename, mtime_ns, size, metadata, content FROM entries WHERE collection = ?',
+                (collection,),
+            ).fetchall()
+        entries = {}
+        for filename, mtime_ns, size, metadata, content in rows:
+            try:
+                entries[filename] = (mtime_ns, size, json.loads(metadata, object_hook=_decode), content)
+            except Exception:
+                continue  # 无法还原的行当作缺失，重新解析文件即可
+        return entries
+
+    def save(self, collection, filename, mtime_ns, size, metadata, content):
+        body_hash = hashlib.sha1(content.encode('utf-8')).hexdigest()
+        try:
+            metadata = json.dumps(metadata, ensure_ascii=False, default=_encode)
+        except (TypeError, ValueError):
+            return  # 含有无法用 JSON 表示的字段，不写入索引，下次启动重新解析文件即可
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (collection, filename, mtime_ns, size, body_hash, metadata, content),
+            )
+
+    def delete(self, collection, filename):
+        with self._lock:
+            self._conn.execute('DELETE FROM entries WHERE collection = ? AND filename = ?', (collection, filename))
+
+    def commit(self):
+        with self._lock:
+            self._conn.commit()
@@ -0,0 +1,173 @@
+import json
+import os
+import threading
+import time
+
+
+class Journal:
+    """
+    追加写的元数据变更日志（JSON Lines），用于评分、喜爱度、排行等小改动。
+
+    record() 只追加一行日志并合并到内存中的待写入字段即可返回，
+    后台线程定期调用 apply(kind, filename, fields) 批量写回 Markdown 文件。
+    启动时 replay() 会重放上次未落盘的日志，进程崩溃也不会丢失变更。
+    """
+
+    def __init__(self, path, apply, interval=2.0):
+        self.path = path
+        self.flushing_path = path + '.flushing'
+        self.apply = apply
+        self.interval = interval
+        self._pending = {}  # (kind, filename) -> {字段: 值}
+        self._flushing = {}  # 正在写回文件的一批变更
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def replay(self):
+        """
+        读取上次未落盘的日志（包括写回到一半的批次），恢复到待写入字段中。
+        """
+        with self._lock:
+            for path in (self.flushing_path, self.path):
+                if not os.path.exists(path):
+                    continue
+                with open(path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            continue  # 崩溃时写了一半的最后一行
+                        self._merge(self._pending, entry['kind'], entry['id'], entry['fields'])
+            if self._pending:
+                # 合并后的结果写回主日志，之后按正常流程落盘
+                self._rewrite(self._pending)
+                if os.path.exists(self.flushing_path):
+                    os.remove(self.flushing_path)
+                self._wakeup.set()
+            print(f"重放元数据日志：{len(self._pending)} 个文件待写入")
+
+    def record(self, kind, filename, fields):
+        self.record_many([(kind, filename, fields)])
+
+    def record_many(self, entries):
+        """
+        追加一批变更并 fsync，返回后即视为已提交。
+        """
+        if not entries:
+            return
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                for kind, filename, fields in entries:
+                    f.write(json.dumps({"kind": kind, "id": filename, "fields": fields}, ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            for kind, filename, fields in entries:
+                self._merge(self._pending, kind, filename, fields)
+        self._wakeup.set()
+
+    def pending(self, kind, filename):
+        """
+        返回该文件尚未落盘的字段（读取时叠加在文件内容之上）。
+        """
+        with self._lock:
+            fields = dict(self._flushing.get((kind, filename), {}))
+            fields.update(self._pending.get((kind, filename), {}))
+            return fields
+
+    def flush(self):
+        """
+        将当前所有待写入的变更写回文件，返回写入的文件数。
+        """
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                batch = self._pending
+                self._pending = {}
+                self._flushing = batch
+                # 新的变更写入新的日志文件，写回完成前保留旧日志以便崩溃后重放
+                if os.path.exists(self.path):
+                    os.replace(self.path, self.flushing_path)
+
+            failed = {}
+            for (kind, filename), fields in batch.items():
+                try:
+                    self.apply(kind, filename, fields)
+                except FileNotFoundError:
+                    print(f"元数据日志写回跳过，文件已不存在 {kind}/{filename}")
+                except Exception as e:
+                    print(f"元数据日志写回错误 {kind}/{filename}: {str(e)}")
+                    failed[(kind, filename)] = fields
+
+            with self._lock:
+                self._flushing = {}
+                if failed:
+                    # 写回失败的变更放回队列（不覆盖期间产生的更新值），下次再试
+                    for key, fields in failed.items():
+                        fields = dict(fields)
+                        fields.update(self._pending.get(key, {}))
+                        self._pending[key] = fields
+                    self._rewrite(self._pending)
+                if os.path.exists(self.flushing_path):
+                    os.remove(self.flushing_path)
+            print(f"元数据日志写回：{len(batch)} 个文件")
+            return len(batch)
+
+    def flush_file(self, kind, filename):
+        """
+        立即写回单个文件的待写入变更，供需要直接重写该文件的接口在写入前调用。
+        """
+        key = (kind, filename)
+        with self._flush_lock:
+            with self._lock:
+                fields = self._pending.pop(key, None)
+                if fields is None:
+                    return
+                self._flushing = {key: fields}
+            try:
+                self.apply(kind, filename, fields)
+            except FileNotFoundError:
+                pass
+            except Exception:
+                with self._lock:
+                    fields = dict(fields)
+                    fields.update(self._pending.get(key, {}))
+                    self._pending[key] = fields
+                raise
+            finally:
+                with self._lock:
+                    self._flushing = {}
+                    self._rewrite(self._pending)
+
+    def start(self):
+        """
+        启动后台写回线程。
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            # 等待一小段时间，让连续的点击合并成一次写入
+            time.sleep(self.interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def _rewrite(self, pending):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for (kind, filename), fields in pending.items():
+                f.write(json.dumps({"kind": kind, "id": filename, "fields": fields}, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def _merge(pending, kind, filename, fields):
+        pending.setdefault((kind, filename), {}).update(fields)
@@ -0,0 +1,59 @@
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows 上没有 fcntl，只保留进程内互斥
+    fcntl = None
+
+
+class FileLock:
+    """
+    同时在线程之间（threading.Lock）和进程之间（锁文件上的 fcntl.flock）互斥的锁，
+    用于多个 gunicorn 工作进程共享同一份内容目录时串行化写入。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+
+    def acquire(self, blocking=True):
+        """
+        获取锁；blocking 为 False 时锁已被占用（本进程其他线程或其他进程）则立即返回 False。
+        """
+        if not self._lock.acquire(blocking):
+            return False
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._file = open(self.path, 'a')
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._file.close()
+            self._file = None
+            self._lock.release()
+            return False
+        except Exception:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self._lock.release()
+            raise
+        return True
+
+    def release(self):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            self._file.close()
+        finally:
+            self._file = None
+            self._lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
@@ -0,0 +1,112 @@
+import bisect
+import math
+
+# 稀疏排行中相邻影片 order 的默认间隔
+ORDER_GAP = 1024
+
+
+def is_finite_order(value):
+    """
+    order 是否为有限数值（缺失、非数字和 inf 的影片排在最后，不作为插入的锚点）。
+    """
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def _longest_increasing(keys):
+    """
+    返回 keys 中严格递增的最长子序列的下标集合（跳过非有限值），O(n log n)。
+    """
+    tails = []  # tails[k] = 长度为 k+1 的递增子序列的最小结尾值
+    tail_index = []
+    parent = [-1] * len(keys)
+    for i, key in enumerate(keys):
+        if not is_finite_order(key):
+            continue
+        k = bisect.bisect_left(tails, key)
+        if k == len(tails):
+            tails.append(key)
+            tail_index.append(i)
+        else:
+            tails[k] = key
+            tail_index[k] = i
+        parent[i] = tail_index[k - 1] if k > 0 else -1
+    keep = set()
+    i = tail_index[-1] if tail_index else -1
+    while i != -1:
+        keep.add(i)
+        i = parent[i]
+    return keep
+
+
+def sparse_orders(sequence, orders):
+    """
+    为目标顺序 sequence（id 列表）计算稀疏 order。
+
+    保留当前 order 已经满足目标顺序的最多影片不动，其余影片插入到相邻影片的
+    间隔中；只有间隔耗尽时才会顺带挪动相邻影片。
+    返回 (changes, exhausted)：changes 为 {id: 新 order}，exhausted 表示是否出现了间隔耗尽。
+    """
+    n = len(sequence)
+    keys = [orders[id] for id in sequence]
+    fixed = [False] * n
+    for i in _longest_increasing(keys):
+        fixed[i] = True
+
+    changes = {}
+    exhausted = False
+    i = 0
+    while i < n:
+        if fixed[i]:
+            i += 1
+            continue
+        lo = i - 1
+        hi = i
+        while hi < n and not fixed[hi]:
+            hi += 1
+
+        while True:
+            count = hi - lo - 1
+            lower = keys[lo] if lo >= 0 else None
+            upper = keys[hi] if hi < n else None
+            if lower is None and upper is None:
+                lower, upper = 0, ORDER_GAP * (count + 1)
+            elif lower is None:
+                lower = upper - ORDER_GAP * (count + 1)
+            elif upper is None:
+                upper = lower + ORDER_GAP * (count + 1)
+            # 相邻 order 可能是小数（手工编辑或旧数据），先取整到能放下整数的边界，
+            # 再检查开区间 (lower, upper) 内是否有 count 个整数
+            lower, upper = math.floor(lower), math.ceil(upper)
+            if upper - lower > count:
+                break
+            # 间隔耗尽：把两侧的锚点也纳入重新分配，直到放得下
+            exhausted = True
+            if lo >= 0:
+                fixed[lo] = False
+                while lo >= 0 and not fixed[lo]:
+                    lo -= 1
+            if hi < n:
+                fixed[hi] = False
+                while hi < n and not fixed[hi]:
+                    hi += 1
+
+        for j, index in enumerate(range(lo + 1, hi), start=1):
+            order = lower + (upper - lower) * j // (count + 1)
+            if keys[index] != order:
+                keys[index] = order
+                changes[sequence[index]] = order
+            fixed[index] = True
+        i = hi
+    return changes, exhausted
+
+
+def rebalanced_orders(sequence, orders):
+    """
+    按 ORDER_GAP 均匀重排整个序列，返回 order 需要变化的 {id: 新 order}。
+    """
+    changes = {}
+    for index, id in enumerate(sequence):
+        order = (index + 1) * ORDER_GAP
+        if orders[id] != order:
+            changes[id] = order
+    return changes
@@ -0,0 +1,231 @@
+import bisect
+import math
+import re
+import threading
+from pypinyin import lazy_pinyin
+
+# 连续的中日韩字符 / 连续的字母数字
+_CJK_RUN = re.compile(r'[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\u3040-\u30ff\uac00-\ud7af]+')
+_WORD = re.compile(r'[0-9a-z]+')
+_MARKUP = re.compile(r'<[^>]+>|!\[[^\]]*\]\([^)]*\)|[#*_`>\[\]()|~-]+')
+
+# 各字段的权重：标题命中比正文命中更重要
+TITLE_WEIGHT = 3
+SUMMARY_WEIGHT = 2
+BODY_WEIGHT = 1
+
+# BM25 参数
+K1 = 1.2
+B = 0.75
+
+
+def tokenize(text):
+    """
+    中文按单字和相邻二字切分（无需词典），英文和数字按单词切分，统一小写。
+    """
+    tokens = []
+    if not text:
+        return tokens
+    text = str(text).lower()
+    for run in _CJK_RUN.findall(text):
+        tokens.extend(run)
+        tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    tokens.extend(_WORD.findall(text))
+    return tokens
+
+
+def query_terms(text):
+    """
+    查询切分：中文只取二字（单字查询取单字），以减少候选文档。
+    """
+    terms = []
+    text = str(text).lower()
+    for run in _CJK_RUN.findall(text):
+        if len(run) == 1:
+            terms.append(run)
+        else:
+            terms.extend(run[i:i + 2] for i in range(len(run) - 1))
+    terms.extend(_WORD.findall(text))
+    return list(dict.fromkeys(terms))
+
+
+def pinyin_tokens(text):
+    """
+    标题的拼音检索词：全拼、首字母缩写以及每个音节，例如 张三 -> zhangsan、zs、zhang、san。
+    """
+    if not text or not _CJK_RUN.search(str(text)):
+        return []
+    syllables = [s.lower() for s in lazy_pinyin(str(text)) if s.isascii() and s.isalpha()]
+    if not syllables:
+        return []
+    return [''.join(syllables), ''.join(s[0] for s in syllables)] + syllables
+
+
+def pinyin_key(text):
+    """
+    名称的拼音排序键（全拼，非中文字符原样保留）。调用方把结果保存在记录中，只在名称变化时重新计算。
+    """
+    return ''.join(lazy_pinyin(str(text))).lower()
+
+
+def plain_text(markdown):
+    """
+    去掉 Markdown/HTML 标记，用于生成摘要片段。
+    """
+    return re.sub(r'\s+', ' ', _MARKUP.sub(' ', markdown or '')).strip()
+
+
+class SearchIndex:
+    """
+    影片、演员、文章的内存全文索引（BM25 排序），随内容缓存的变更回调增量更新。
+    """
+
+    def __init__(self):
+        self._postings = {}  # token -> {doc_key: 加权词频}
+        self._docs = {}  # doc_key -> {"title", "summary", "body", "length", "tokens"}
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    def update(self, doc_key, title, summary='', body=''):
+        """
+        新增或替换一个文档。doc_key 为 (类型, id)。
+        """
+        with self._lock:
+            doc = self._docs.get(doc_key)
+            if doc and doc['title'] == title and doc['summary'] == summary and doc['body'] == body:
+                return  # 只改了评分、排序等非文本字段
+
+        weighted = {}
+        for tokens, weight in (
+            (tokenize(title) + pinyin_tokens(title), TITLE_WEIGHT),
+            (tokenize(summary), SUMMARY_WEIGHT),
+            (tokenize(body), BODY_WEIGHT),
+        ):
+            for token in tokens:
+                weighted[token] = weighted.get(token, 0) + weight
+        length = sum(weighted.values())
+
+        with self._lock:
+            self._remove(doc_key)
+            for token, tf in weighted.items():
+                self._postings.setdefault(token, {})[doc_key] = tf
+            self._docs[doc_key] = {
+                "title": title,
+                "summary": summary,
+                "body": body,
+                "length": length,
+                "tokens": list(weighted),
+            }
+            self._total_length += length
+
+    def remove(self, doc_key):
+        with self._lock:
+            self._remove(doc_key)
+
+    def _remove(self, doc_key):
+        doc = self._docs.pop(doc_key, None)
+        if doc is None:
+            return
+        for token in doc['tokens']:
+            postings = self._postings.get(token)
+            if postings is not None:
+                postings.pop(doc_key, None)
+                if not postings:
+                    del self._postings[token]
+        self._total_length -= doc['length']
+
+    def search(self, query, kinds=None):
+        """
+        返回按相关度排序的 [(doc_key, score)]。
+        优先返回包含全部查询词的文档，没有时退回到包含任意查询词的文档。
+        """
+        terms = query_terms(query)
+        if not terms:
+            return []
+        with self._lock:
+            postings = [self._postings.get(term, {}) for term in terms]
+            candidates = set.intersection(*(set(p) for p in postings)) if all(postings) else set()
+            if not candidates:
+                candidates = set().union(*(set(p) for p in postings))
+            if kinds:
+                candidates = {key for key in candidates if key[0] in kinds}
+
+            count = len(self._docs) or 1
+            average_length = self._total_length / count or 1
+            results = []
+            for key in candidates:
+                length = self._docs[key]['length']
+                score = 0.0
+                for term_postings in postings:
+                    tf = term_postings.get(key)
+                    if not tf:
+                        continue
+                    idf = math.log(1 + (count - len(term_postings) + 0.5) / (len(term_postings) + 0.5))
+                    score += idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / average_length))
+                results.append((key, score))
+            results.sort(key=lambda item: (-item[1], item[0]))
+            return [(key, round(score, 4)) for key, score in results]
+
+    def snippet(self, doc_key, query, width=60):
+        """
+        生成包含查询词的正文片段。
+        """
+        with self._lock:
+            doc = self._docs.get(doc_key)
+        if doc is None:
+            return ''
+
+        text = plain_text(doc['body']) or plain_text(doc['summary'])
+        lowered = text.lower()
+        # 优先定位完整查询串，其次是任意一个查询词
+        for needle in [str(query).lower().strip()] + query_terms(query):
+            position = lowered.find(needle) if needle else -1
+            if position != -1:
+                start = max(position - width // 3, 0)
+                snippet = text[start:start + width]
+                return ('…' if start > 0 else '') + snippet + ('…' if start + width < len(text) else '')
+        return text[:width] + ('…' if len(text) > width else '')
+
+
+class PrefixIndex:
+    """
+    前缀查找：有序的 (键, 值) 数组 + 二分查找，用于姓名、拼音全拼和首字母的自动补全。
+    """
+
+    def __init__(self):
+        self._entries = []  # 按键排序的 [(key, value)]
+        self._keys = {}  # value -> [key]
+        self._lock = threading.Lock()
+
+    def update(self, value, keys):
+        keys = sorted({str(key).lower() for key in keys if key})
+        with self._lock:
+            if self._keys.get(value) == keys:
+                return
+            self._remove(value)
+            for key in keys:
+                bisect.insort(self._entries, (key, value))
+            self._keys[value] = keys
+
+    def remove(self, value):
+        with self._lock:
+            self._remove(value)
+
+    def _remove(self, value):
+        for key in self._keys.pop(value, []):
+            position = bisect.bisect_left(self._entries, (key, value))
+            if position < len(self._entries) and self._entries[position] == (key, value):
+                del self._entries[position]
+
+    def lookup(self, prefix):
+        """
+        返回任意键以 prefix 开头的值（去重，按命中的键排序）。
+        """
+        prefix = str(prefix).lower()
+        values = {}
+        with self._lock:
+            position = bisect.bisect_left(self._entries, (prefix,))
+            while position < len(self._entries) and self._entries[position][0].startswith(prefix):
+                values.setdefault(self._entries[position][1], None)
+                position += 1
+        return list(values)
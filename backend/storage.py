@@ -0,0 +1,122 @@
+import contextlib
+import hashlib
+import os
+import shutil
+import uuid
+import frontmatter
+from locks import FileLock
+
+# 文件锁的分片数：按路径哈希映射到固定数量的锁文件，锁文件数量不随内容文件增长
+LOCK_STRIPES = 64
+
+
+class FileStore:
+    """
+    Markdown 文件的写入层：按文件加锁，先写临时文件再原子替换。
+
+    同一文件的修改在线程和工作进程之间串行执行；读取方不加锁，
+    由于 os.replace 是原子的，读到的始终是某个完整版本，不会看到写了一半的文件。
+    不同文件可能落在同一个锁分片上而互相等待，因此持有一个文件的锁时不能再获取另一个文件的锁。
+    """
+
+    def __init__(self, lock_folder, stripes=LOCK_STRIPES):
+        self.lock_folder = lock_folder
+        self._locks = [FileLock(os.path.join(lock_folder, f"stripe-{index:02x}.lock")) for index in range(stripes)]
+        self._remove_legacy_locks()
+
+    def lock(self, path):
+        """
+        返回该文件的锁（按绝对路径哈希选取的锁分片）。锁文件放在 lock_folder 中，不随内容文件的替换而改变。
+        """
+        digest = hashlib.sha1(os.path.abspath(path).encode('utf-8')).digest()
+        return self._locks[int.from_bytes(digest[:4], 'big') % len(self._locks)]
+
+    def _remove_legacy_locks(self):
+        # 旧版本为每个内容文件各建一个锁文件（<sha1>.lock），不再使用
+        try:
+            names = os.listdir(self.lock_folder)
+        except FileNotFoundError:
+            return
+        for name in names:
+            if len(name) == 45 and name.endswith('.lock'):
+                try:
+                    os.remove(os.path.join(self.lock_folder, name))
+                except OSError:
+                    pass
+
+    def write(self, path, text):
+        """
+        原子地写入整个文件（新建或覆盖）。
+        """
+        with self.lock(path):
+            self._replace(path, text)
+
+    @contextlib.contextmanager
+    def edit(self, path):
+        """
+        加锁读取文件为 frontmatter.Post，with 代码块正常结束后原子写回；
+        代码块抛出异常时文件保持不变。文件不存在时抛出 FileNotFoundError。
+        """
+        with self.lock(path):
+            post = frontmatter.load(path)
+            yield post
+            self._replace(path, frontmatter.dumps(post))
+
+    def write_many(self, files):
+        """
+        批量原子写入 [(路径, 内容)]：先写完并 fsync 全部临时文件，再逐个加锁替换，
+        最后每个目录只同步一次（逐个调用 write() 时每个文件都要同步一次目录）。用于批量导入。
+        """
+        pending = []
+        try:
+            for path, text in files:
+                tmp_path = self._tmp_path(path)
+                pending.append((tmp_path, path))
+                with open(tmp_path, 'x', encoding='utf-8') as f:
+                    f.write(text)
+                    f.flush()
+                    os.fsync(f.fileno())
+            for tmp_path, path in pending:
+                with self.lock(path):
+                    if os.path.exists(path):
+                        shutil.copymode(path, tmp_path)
+                    os.replace(tmp_path, path)
+        finally:
+            for tmp_path, _ in pending:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+        for folder in {os.path.dirname(path) for _, path in pending}:
+            self._sync_folder(folder)
+
+    @staticmethod
+    def _tmp_path(path):
+        return os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.{uuid.uuid4().hex[:8]}.tmp")
+
+    @staticmethod
+    def _sync_folder(folder):
+        # 同步目录项，保证重命名在断电后依然有效
+        try:
+            dir_fd = os.open(folder, os.O_RDONLY)
+        except OSError:
+            return  # 部分平台不支持打开目录
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+    @classmethod
+    def _replace(cls, path, text):
+        tmp_path = cls._tmp_path(path)
+        try:
+            with open(tmp_path, 'x', encoding='utf-8') as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            if os.path.exists(path):
+                shutil.copymode(path, tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        cls._sync_folder(os.path.dirname(path))
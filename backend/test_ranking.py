@@ -0,0 +1,58 @@
+import random
+import unittest
+
+from ranking import ORDER_GAP, rebalanced_orders, sparse_orders
+
+
+def apply(sequence, orders, changes):
+    return [changes.get(id, orders[id]) for id in sequence]
+
+
+def random_key(rng):
+    kind = rng.random()
+    if kind < 0.15:
+        return None
+    if kind < 0.2:
+        return float('inf')
+    if kind < 0.5:
+        return rng.choice([0.5, 1.5, 2.5, 13, -0.25]) + rng.randint(-3, 3)
+    return rng.randint(-5, 20) * rng.choice([1, ORDER_GAP])
+
+
+class SparseOrdersTest(unittest.TestCase):
+    """
+    性质测试：任意（包括小数、重复、缺失的）现有 order 下，结果都严格递增且只由整数填补。
+    """
+
+    def test_result_strictly_increasing(self):
+        rng = random.Random(20240601)
+        for _ in range(20000):
+            n = rng.randint(1, 8)
+            sequence = [f"m{i}" for i in range(n)]
+            orders = {id: random_key(rng) for id in sequence}
+            changes, _ = sparse_orders(sequence, orders)
+            result = apply(sequence, orders, changes)
+            self.assertTrue(all(a < b for a, b in zip(result, result[1:])), (orders, result))
+            for order in changes.values():
+                self.assertIsInstance(order, int)
+
+    def test_fractional_neighbours(self):
+        sequence = list('abcdef')
+        orders = dict(zip(sequence, [None, None, 0, 13, 2.5, 2.5]))
+        changes, _ = sparse_orders(sequence, orders)
+        result = apply(sequence, orders, changes)
+        self.assertTrue(all(a < b for a, b in zip(result, result[1:])), result)
+
+    def test_already_sorted_unchanged(self):
+        sequence = list('abc')
+        orders = {'a': 1024, 'b': 2048, 'c': 3072}
+        self.assertEqual(sparse_orders(sequence, orders), ({}, False))
+
+    def test_rebalanced(self):
+        sequence = list('abc')
+        orders = {'a': 1, 'b': 2, 'c': 3072}
+        self.assertEqual(rebalanced_orders(sequence, orders), {'a': 1024, 'b': 2048})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import hashlib
+import os
+import threading
+import uuid
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # 未安装 Pillow 时退回到原图
+    Image = None
+
+# 可生成的宽度档位，请求的宽度向上取整到最近的档位，避免任意宽度产生无限多的缓存文件
+THUMBNAIL_WIDTHS = (160, 320, 480, 640, 960, 1280, 1920)
+
+FORMATS = {
+    'webp': ('WEBP', 'image/webp'),
+    'jpeg': ('JPEG', 'image/jpeg'),
+}
+
+
+class Thumbnailer:
+    """
+    封面和图床图片的缩略图生成与磁盘缓存。
+
+    缓存文件名包含原图的 mtime/size，原图被替换后自动生成新的缩略图并清理旧的。
+    """
+
+    def __init__(self, cache_folder, quality=80):
+        self.cache_folder = cache_folder
+        self.quality = quality
+        self._locks = {}  # 缓存路径 -> threading.Lock
+        self._locks_guard = threading.Lock()
+
+    @staticmethod
+    def snap_width(width):
+        """
+        将请求的宽度向上取整到 THUMBNAIL_WIDTHS 中的档位。
+        """
+        for candidate in THUMBNAIL_WIDTHS:
+            if width <= candidate:
+                return candidate
+        return THUMBNAIL_WIDTHS[-1]
+
+    def variant(self, source_path, width, fmt):
+        """
+        返回原图缩放到 width（不放大）并转为 fmt 的缓存文件路径，必要时生成。
+        无法生成（未安装 Pillow、动图、原图不比目标小）时返回 None，调用方应直接返回原图。
+        """
+        if Image is None or fmt not in FORMATS:
+            return None
+        stat = os.stat(source_path)
+        folder = self._folder(source_path)
+        version = f"{stat.st_mtime_ns}-{stat.st_size}"
+        cache_path = os.path.join(folder, f"{version}-w{width}.{fmt}")
+        if os.path.exists(cache_path):
+            return cache_path
+        skip_path = os.path.join(folder, f"{version}-w{width}.skip")
+        if os.path.exists(skip_path):
+            return None
+
+        with self._lock(cache_path):
+            if os.path.exists(cache_path):
+                return cache_path
+            os.makedirs(folder, exist_ok=True)
+            self._prune(folder, version)
+            with Image.open(source_path) as image:
+                if getattr(image, 'is_animated', False) or image.width <= width:
+                    # 动图和本身就够小的图片直接使用原图，记下结果避免每次都打开原图
+                    open(skip_path, 'w').close()
+                    return None
+                image = ImageOps.exif_transpose(image)
+                image.thumbnail((width, width * 10), Image.LANCZOS)
+                if fmt == 'jpeg' and image.mode != 'RGB':
+                    image = self._flatten(image)
+                elif image.mode not in ('RGB', 'RGBA'):
+                    image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+                tmp_path = f"{cache_path}.{uuid.uuid4().hex[:8]}.tmp"
+                image.save(tmp_path, FORMATS[fmt][0], quality=self.quality, optimize=True)
+                os.replace(tmp_path, cache_path)
+        return cache_path
+
+    def pregenerate(self, source_path, widths, formats=('webp', 'jpeg')):
+        """
+        在后台线程中预先生成常用尺寸（上传后调用），不阻塞请求。
+        """
+        def run():
+            for width in widths:
+                for fmt in formats:
+                    try:
+                        self.variant(source_path, width, fmt)
+                    except Exception as e:
+                        print(f"缩略图生成错误 {source_path}: {str(e)}")
+                        return
+        threading.Thread(target=run, daemon=True).start()
+
+    def _folder(self, source_path):
+        key = hashlib.sha1(os.path.abspath(source_path).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_folder, key[:2], key)
+
+    @staticmethod
+    def _prune(folder, version):
+        # 删除原图旧版本的缩略图
+        for name in os.listdir(folder):
+            if not name.startswith(version + '-') and not name.endswith('.tmp'):
+                try:
+                    os.remove(os.path.join(folder, name))
+                except FileNotFoundError:
+                    pass
+
+    @staticmethod
+    def _flatten(image):
+        # JPEG 不支持透明通道，铺到白色背景上
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+
+    def _lock(self, cache_path):
+        with self._locks_guard:
+            return self._locks.setdefault(cache_path, threading.Lock())
@@ -0,0 +1,206 @@
+import hashlib
+import json
+import os
+import time
+import uuid
+
+# 每次从请求流读取的块大小
+CHUNK_SIZE = 64 * 1024
+
+# 允许的图片类型：类型 -> 扩展名
+IMAGE_EXTENSIONS = {
+    'png': ('.png',),
+    'jpeg': ('.jpg', '.jpeg'),
+    'gif': ('.gif',),
+    'webp': ('.webp',),
+}
+
+
+class UploadError(Exception):
+    """
+    上传内容不合法（类型不支持、文件过大、续传偏移不一致等），code 为对应的 HTTP 状态码。
+    """
+
+    def __init__(self, message, code=400):
+        super().__init__(message)
+        self.code = code
+
+
+def sniff_image(head):
+    """
+    根据文件头的魔数判断图片类型，不是支持的图片时返回 None。
+    """
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'jpeg'
+    if head[:6] in (b'GIF87a', b'GIF89a'):
+        return 'gif'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+def allowed_extension(filename):
+    ext = os.path.splitext(filename)[1].lower()
+    return any(ext in extensions for extensions in IMAGE_EXTENSIONS.values())
+
+
+def check_image(head, filename=None):
+    """
+    根据文件头判断图片类型，给出 filename 时还要求类型与其扩展名一致（例如 PNG 内容不能存为 .jpg）。
+    返回图片类型，不合法时抛出 UploadError。
+    """
+    image_type = sniff_image(head)
+    if image_type is None:
+        raise UploadError("文件内容不是支持的图片格式（png/jpg/gif/webp）")
+    if filename is not None and os.path.splitext(filename)[1].lower() not in IMAGE_EXTENSIONS[image_type]:
+        raise UploadError(f"文件内容是 {image_type} 图片，与扩展名不符")
+    return image_type
+
+
+def save_stream(read, dest_path, max_bytes, filename=None):
+    """
+    从 read(size) 分块读取图片写入 dest_path 同目录下的临时文件，边写边计算 sha256，
+    校验文件头（给出 filename 时还核对扩展名）和大小后原子替换到 dest_path。返回 {"type", "size", "sha256"}。
+    """
+    folder = os.path.dirname(dest_path)
+    os.makedirs(folder, exist_ok=True)
+    tmp_path = os.path.join(folder, f".{os.path.basename(dest_path)}.{uuid.uuid4().hex[:8]}.tmp")
+    digest = hashlib.sha256()
+    size = 0
+    image_type = None
+    try:
+        with open(tmp_path, 'xb') as f:
+            while True:
+                chunk = read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                if image_type is None:
+                    # 第一块就检查文件头，不是图片立即拒绝，不再读取剩余内容
+                    image_type = check_image(chunk[:16], filename)
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadError(f"图片不能超过 {max_bytes // (1024 * 1024)}MB", 413)
+                digest.update(chunk)
+                f.write(chunk)
+            if image_type is None:
+                raise UploadError("文件为空")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return {"type": image_type, "size": size, "sha256": digest.hexdigest()}
+
+
+class ResumableUploads:
+    """
+    可断点续传的上传：先创建上传任务，再按偏移分块追加，中断后查询已接收的偏移继续上传。
+
+    未完成的数据保存在 folder 下的 <id>.part，元数据保存在 <id>.json，超过 expire 秒未更新的任务会被清理。
+    """
+
+    def __init__(self, folder, max_bytes, expire=24 * 3600, save=save_stream):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.expire = expire
+        self.save = save  # save(read, dest_path, max_bytes, filename)，完成时保存文件
+
+    def create(self, filename, size):
+        if not allowed_extension(filename):
+            raise UploadError("不支持的文件类型")
+        if not isinstance(size, int) or size <= 0:
+            raise UploadError("请提供文件大小")
+        if size > self.max_bytes:
+            raise UploadError(f"图片不能超过 {self.max_bytes // (1024 * 1024)}MB", 413)
+        self.cleanup()
+        os.makedirs(self.folder, exist_ok=True)
+        upload_id = uuid.uuid4().hex
+        open(self._part_path(upload_id), 'xb').close()
+        with open(self._meta_path(upload_id), 'w', encoding='utf-8') as f:
+            json.dump({"filename": filename, "size": size}, f, ensure_ascii=False)
+        return upload_id
+
+    def status(self, upload_id):
+        """
+        返回 {"filename", "size", "offset"}，任务不存在时抛出 UploadError(404)。
+        """
+        meta_path = self._meta_path(upload_id)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            meta['offset'] = os.path.getsize(self._part_path(upload_id))
+        except (FileNotFoundError, ValueError):
+            raise UploadError("上传任务不存在或已过期", 404)
+        return meta
+
+    def append(self, upload_id, offset, read):
+        """
+        从 offset 处追加数据，offset 必须等于已接收的长度。返回新的偏移。
+        """
+        meta = self.status(upload_id)
+        if offset != meta['offset']:
+            raise UploadError(f"偏移不一致，服务器已接收 {meta['offset']} 字节", 409)
+        received = offset
+        with open(self._part_path(upload_id), 'ab') as f:
+            while True:
+                chunk = read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                if received == 0:
+                    check_image(chunk[:16], meta['filename'])
+                received += len(chunk)
+                if received > meta['size']:
+                    raise UploadError("上传内容超过声明的文件大小", 413)
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        return received
+
+    def finish(self, upload_id, dest_path):
+        """
+        数据全部到达后校验并原子保存到 dest_path，返回 save 的结果。
+        """
+        meta = self.status(upload_id)
+        if meta['offset'] != meta['size']:
+            raise UploadError(f"上传尚未完成，已接收 {meta['offset']}/{meta['size']} 字节", 409)
+        part_path = self._part_path(upload_id)
+        with open(part_path, 'rb') as f:
+            info = self.save(f.read, dest_path, self.max_bytes, meta['filename'])
+        self.abort(upload_id)
+        return info
+
+    def abort(self, upload_id):
+        for path in (self._part_path(upload_id), self._meta_path(upload_id)):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def cleanup(self):
+        """
+        删除过期的未完成任务。
+        """
+        if not os.path.isdir(self.folder):
+            return
+        deadline = time.time() - self.expire
+        for name in os.listdir(self.folder):
+            path = os.path.join(self.folder, name)
+            try:
+                if os.path.getmtime(path) < deadline:
+                    os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _part_path(self, upload_id):
+        return os.path.join(self.folder, f"{self._check_id(upload_id)}.part")
+
+    def _meta_path(self, upload_id):
+        return os.path.join(self.folder, f"{self._check_id(upload_id)}.json")
+
+    @staticmethod
+    def _check_id(upload_id):
+        if len(upload_id) != 32 or any(c not in '0123456789abcdef' for c in upload_id):
+            raise UploadError("上传任务不存在或已过期", 404)
+        return upload_id
@@ -0,0 +1,87 @@
+import os
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
+from watchdog.observers.polling import PollingObserver
+
+
+class _FolderHandler(FileSystemEventHandler):
+    """
+    把某个文件夹下的文件事件转换为 callback(filename) 调用。
+    recursive 为 False 时只处理文件夹的直接子文件。
+    """
+
+    def __init__(self, folder, callbacks, recursive=False):
+        self.folder = os.path.normpath(folder)
+        self.callbacks = callbacks
+        self.recursive = recursive
+
+    def _notify(self, path):
+        path = os.fsdecode(path)
+        if not self.recursive and os.path.normpath(os.path.dirname(path)) != self.folder:
+            return
+        filename = os.path.basename(path)
+        for callback in self.callbacks:
+            try:
+                callback(filename)
+            except Exception as e:
+                print(f"处理文件变化错误 {path}: {str(e)}")
+
+    def on_any_event(self, event):
+        if event.is_directory or event.event_type in ('opened', 'closed_no_write'):
+            return
+        self._notify(event.src_path)
+        if event.event_type == 'moved':
+            self._notify(event.dest_path)
+
+
+class ContentWatcher:
+    """
+    监听内容文件夹的新增、修改、删除和重命名，推送给注册的缓存和索引。
+
+    Linux 上使用 inotify（watchdog 默认 Observer），无法使用时退回到轮询。
+    """
+
+    def __init__(self, poll_interval=2.0):
+        self.poll_interval = poll_interval
+        self._callbacks = {}  # folder -> [callback]
+        self._recursive = set()
+        self._observer = None
+
+    def watch(self, folder, callback, recursive=False):
+        """
+        注册文件夹及其回调 callback(filename)，同一文件夹可注册多个回调。
+        recursive 为 True 时同时监听子文件夹。
+        """
+        folder = os.path.normpath(folder)
+        self._callbacks.setdefault(folder, []).append(callback)
+        if recursive:
+            self._recursive.add(folder)
+
+    def start(self):
+        """
+        启动监听，返回是否成功。
+        """
+        for observer_class in (Observer, PollingObserver):
+            try:
+                if observer_class is PollingObserver:
+                    observer = PollingObserver(timeout=self.poll_interval)
+                else:
+                    observer = observer_class()
+                for folder, callbacks in self._callbacks.items():
+                    os.makedirs(folder, exist_ok=True)
+                    recursive = folder in self._recursive
+                    observer.schedule(_FolderHandler(folder, callbacks, recursive), folder, recursive=recursive)
+                observer.daemon = True
+                observer.start()
+            except Exception as e:
+                print(f"文件监听启动失败（{observer_class.__name__}）: {str(e)}")
+                continue
+            self._observer = observer
+            print(f"文件监听已启动（{observer_class.__name__}）：{len(self._callbacks)} 个文件夹")
+            return True
+        return False
+
+    def stop(self):
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer = None
@@ -0,0 +1,15 @@
+// 生成后端缩略图地址：/imgs/... 图片加上 w 参数后返回缩放后的 WebP/JPEG，其他地址原样返回
+export function thumbnailUrl(url, width) {
+  if (!url || !url.startsWith('/imgs/')) {
+    return url
+  }
+  return `${url}${url.includes('?') ? '&' : '?'}w=${width}`
+}
+
+// 1x/2x 屏幕对应的 srcset
+export function thumbnailSrcset(url, width) {
+  if (!url || !url.startsWith('/imgs/')) {
+    return undefined
+  }
+  return `${thumbnailUrl(url, width)} 1x, ${thumbnailUrl(url, width * 2)} 2x`
+}